@@ -0,0 +1,116 @@
+'''Generate synthetic tasks.db fixtures for the benchmarks.
+
+The database is created with the app's own migrations, then filled with
+tasks spread over tags, habits spread over categories and daily sleep logs.
+Generation is seeded, so the same arguments always give the same data.
+
+Usage: python benchmarks/fixtures.py PATH [--scale NAME] [--tasks N] [--tags N]
+           [--habits N] [--categories N] [--sleep-years N] [--seed N]
+'''
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.database import migrate
+
+SCALES = {
+    "small": dict(tasks=1_000, tags=100, habits=200, categories=20, sleep_years=1),
+    "medium": dict(tasks=100_000, tags=2_000, habits=2_000, categories=200, sleep_years=5),
+    "large": dict(tasks=1_000_000, tags=5_000, habits=10_000, categories=1_000, sleep_years=20),
+}
+FREQUENCIES = ['daily', 'weekly', 'monthly', 'yearly']
+HABIT_STATUSES = [('incomplete', 0), ('partially_completed', 25), ('halfway_completed', 50), ('mostly_completed', 75), ('complete', 100)]
+WORDS = ["email", "report", "groceries", "meeting", "review", "gym", "call", "plan", "read", "invoice", "laundry", "study"]
+BATCH_SIZE = 50_000
+
+def batches(rows):
+    '''Split an iterable of rows into lists of at most BATCH_SIZE'''
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def task_rows(rng, count, tags):
+    statuses = ['completed'] * 8 + ['upcoming', 'overdue']
+    start = date.today() - timedelta(days=365)
+    for i in range(count):
+        due = start + timedelta(days=rng.randrange(730))
+        due_time = f"{rng.randrange(24):02}:{rng.randrange(60):02}" if rng.random() < 0.7 else None
+        words = " ".join(rng.sample(WORDS, 3))
+        yield (f"task {i} {words}", due.isoformat(), due_time, f"Notes about {words}", rng.randint(1, tags), rng.choice(statuses))
+
+def habit_rows(rng, count, categories):
+    start = date.today() - timedelta(days=365)
+    for i in range(count):
+        status, progress = rng.choice(HABIT_STATUSES)
+        started = start + timedelta(days=rng.randrange(365))
+        yield (f"habit {i}", f"Keep up habit {i}", rng.choice(FREQUENCIES), status, started.isoformat(), progress, rng.randint(1, categories))
+
+def sleep_rows(rng, years):
+    today = date.today()
+    for day in range(years * 365):
+        yield ((today - timedelta(days=day + 1)).isoformat(), round(rng.uniform(4, 10), 1))
+
+def generate(path, tasks, tags, habits, categories, sleep_years, seed=0):
+    '''Create a migrated database at path filled with synthetic rows'''
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")  # A crash mid-generation just means generating again
+    migrate(conn)
+
+    # The 'misc' tag and category from the migrations take id 1
+    conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(f"tag {i}",) for i in range(tags - 1)])
+    conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", [(f"category {i}",) for i in range(categories - 1)])
+    for batch in batches(task_rows(rng, tasks, tags)):
+        conn.executemany("INSERT INTO tasks (title, due_date, due_time, description, tag_id, status) VALUES (?, ?, ?, ?, ?, ?)", batch)
+    conn.executemany(
+        "INSERT INTO habits (name, description, frequency, status, start_date, progress, category_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        habit_rows(rng, habits, categories)
+    )
+    conn.executemany("INSERT INTO sleep_logs (date, hours_slept) VALUES (?, ?)", sleep_rows(rng, sleep_years))
+    conn.commit()
+
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+
+def add_arguments(parser):
+    '''Add the fixture size options to an argument parser'''
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f"override the scale's {name}")
+    parser.add_argument("--seed", type=int, default=0)
+
+def fixture_size(args):
+    '''Return the generate() keyword arguments chosen by the parsed options'''
+    size = dict(SCALES[args.scale])
+    for name in size:
+        if getattr(args, name) is not None:
+            size[name] = getattr(args, name)
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    size = fixture_size(args)
+    start = time.perf_counter()
+    generate(args.path, seed=args.seed, **size)
+    print(f"Wrote {args.path} ({', '.join(f'{name}={value}' for name, value in size.items())}) in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
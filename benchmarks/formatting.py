@@ -0,0 +1,37 @@
+'''Compare per-row time formatting cost for a 100k-row list load.
+
+Usage: python benchmarks/formatting.py [rows]
+'''
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.formatting import to_12_hour
+
+def strptime_format(time_str):
+    '''The previous per-row implementation'''
+    try:
+        return datetime.strptime(time_str, "%H:%M").strftime("%I:%M %p")
+    except ValueError:
+        return None
+
+def measure(function, times):
+    start = time.perf_counter()
+    for time_str in times:
+        function(time_str)
+    return time.perf_counter() - start
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    times = [f"{random.randint(0, 23):02}:{random.randint(0, 59):02}" for _ in range(rows)]
+    assert all(strptime_format(t) == to_12_hour(t) for t in times[:1000])
+
+    for name, function in (("strptime/strftime", strptime_format), ("lookup table", to_12_hour)):
+        elapsed = measure(function, times)
+        print(f"{name:18} {elapsed * 1000:8.1f} ms total  {elapsed / rows * 1e9:8.0f} ns/row")
+
+if __name__ == "__main__":
+    main()
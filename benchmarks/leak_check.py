@@ -0,0 +1,109 @@
+'''Check that navigating around the app doesn't leak memory or Tcl commands.
+
+Starts the app (without its mainloop) against an empty database, then
+switches screens and opens and closes the task forms the given number of
+times, pumping Tk events after each step. After a warm-up it samples the
+process RSS and the number of Tcl commands, and fails if either keeps
+growing. Needs Tk: with no display, Xvfb is started if it is installed.
+
+Usage: python benchmarks/leak_check.py [--navigations N] [--max-rss-growth-mb MB] [--max-command-growth N]
+'''
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_paths import virtual_display
+
+DEFAULT_NAVIGATIONS = 10_000
+# Screens visited in turn. The calendar needs Google credentials, so it is left out.
+ROUTE = ["pomodoro", "tasks", "timers", "sleep", "habits", "home"]
+WARMUP_FRACTION = 0.1
+DEFAULT_MAX_RSS_GROWTH_MB = 10
+DEFAULT_MAX_COMMAND_GROWTH = 0
+
+def rss_mb():
+    '''Resident set size of this process in MB'''
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        # Peak rather than current RSS, but it still only grows if memory does
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def tcl_command_count(root):
+    return len(root.tk.splitlist(root.tk.call("info", "commands")))
+
+def settle(root, app):
+    '''Process Tk events until the current screen's background queries are shown'''
+    screen = app.screens.screens[app.screens.current]
+    deadline = time.monotonic() + 10
+    while getattr(screen, "queries", None) is not None and screen.queries.pending and time.monotonic() < deadline:
+        root.update()
+        time.sleep(0.001)
+    root.update()
+
+def navigate(root, app, step):
+    name = ROUTE[step % len(ROUTE)]
+    app.show(name)
+    if name == "tasks":
+        # Open and close the new task form, which builds its validated spinboxes afresh each time
+        screen = app.screens.screens["tasks"]
+        screen.render_task_form()
+        root.update()
+        screen.reset_left_frame()
+    settle(root, app)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--navigations", type=int, default=DEFAULT_NAVIGATIONS)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=DEFAULT_MAX_RSS_GROWTH_MB)
+    parser.add_argument("--max-command-growth", type=int, default=DEFAULT_MAX_COMMAND_GROWTH)
+    args = parser.parse_args()
+    warmup = max(len(ROUTE), int(args.navigations * WARMUP_FRACTION))
+    if args.navigations <= warmup:
+        sys.exit(f"--navigations must be more than the {warmup} warm-up navigations")
+
+    with tempfile.TemporaryDirectory() as work_dir, virtual_display() as available:
+        if not available:
+            sys.exit("No display and no Xvfb; can't run the leak check")
+
+        import tkinter as tk
+        from main import SmartClockApp
+
+        cwd = os.getcwd()
+        os.chdir(work_dir)  # The app keeps its database under ./data
+        root = tk.Tk()
+        app = SmartClockApp(root)
+        try:
+            start = time.perf_counter()
+            for step in range(args.navigations):
+                navigate(root, app, step)
+                if step + 1 == warmup:
+                    base_rss, base_commands = rss_mb(), tcl_command_count(root)
+            end_rss, end_commands = rss_mb(), tcl_command_count(root)
+            elapsed = time.perf_counter() - start
+        finally:
+            app.quit()
+            os.chdir(cwd)
+
+    print(f"{args.navigations} navigations in {elapsed:.1f} s")
+    print(f"RSS:          {base_rss:8.1f} MB after warm-up, {end_rss:8.1f} MB at the end ({end_rss - base_rss:+.1f} MB)")
+    print(f"Tcl commands: {base_commands:8} after warm-up, {end_commands:8} at the end ({end_commands - base_commands:+})")
+
+    failures = []
+    if end_rss - base_rss > args.max_rss_growth_mb:
+        failures.append(f"RSS grew by {end_rss - base_rss:.1f} MB")
+    if end_commands - base_commands > args.max_command_growth:
+        failures.append(f"{end_commands - base_commands} Tcl commands were never deleted")
+    if failures:
+        sys.exit("Leak check failed: " + "; ".join(failures))
+    print("No leaks found")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+'''Benchmark every screen's load paths and the save, update and delete paths against a synthetic database.
+
+Generates (or reuses) a fixture from benchmarks/fixtures.py and times:
+- the background read each screen's load_* method runs,
+- each write as the screens submit it: through the write queue, until committed,
+- with --screens, building each screen and its load_* method until the
+  rows are shown. This needs Tk; with no display, Xvfb is started if it
+  is installed, and the screen benchmarks are skipped otherwise.
+
+Results are printed and can be saved as JSON. Given --baseline, each
+median is compared with the baseline's, and the run fails if any is
+slower by more than --tolerance (and by more than --noise-ms).
+
+Usage: python benchmarks/load_paths.py [--scale NAME] [--fixture PATH] [--runs N]
+           [--screens] [--output PATH] [--baseline PATH] [--tolerance F] [--noise-ms MS]
+'''
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fixtures
+from components.database import close_connections, get_pool
+from components.stores import HabitStore, SleepStore, TaskStore
+from components.task_list_view import VirtualTaskList
+from components.write_queue import DEFAULT_DURABILITY, DURABILITY, WriteQueue
+
+DEFAULT_RUNS = 20
+DEFAULT_TOLERANCE = 0.25
+# Slowdowns smaller than this are timer noise, whatever the percentage
+DEFAULT_NOISE_MS = 0.5
+# The window VirtualTaskList reads with its default height and overscan
+TASK_WINDOW = SimpleNamespace(height=20, overscan=10)
+SCREEN_TIMEOUT_SECONDS = 60
+# Sleep logs written by the benchmarks are dated from here on, clear of the fixture's
+BENCH_DATES = date(2100, 1, 1)
+EDITED_DATES = date(2200, 1, 1)
+
+def summarize(timings):
+    '''Return the summary statistics of a list of millisecond timings'''
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min_ms": round(timings[0], 3),
+        "median_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "max_ms": round(timings[-1], 3),
+    }
+
+def measure(func, runs, setup=None, warmup=1):
+    '''Time func(setup()) runs times, after warmup untimed calls'''
+    timings = []
+    for i in range(warmup + runs):
+        value = setup() if setup else None
+        start = time.perf_counter()
+        func(value)
+        if i >= warmup:
+            timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+def read_benchmarks():
+    '''(name, query) for the read behind each screen's load method'''
+    return [
+        ("TaskManager.load_tasks", lambda conn: VirtualTaskList.read_window(TASK_WINDOW, TaskStore(conn), None)),
+        ("TaskManager.search", lambda conn: TaskStore(conn).search(["gro", "rep"], 100)),
+        ("PomodoroTimer.load_tasks", lambda conn: TaskStore(conn).active()),
+        ("HabitTracker.load_habits", lambda conn: HabitStore(conn).all()),
+        ("SleepLogger.load_logs", lambda conn: SleepStore(conn).all()),
+    ]
+
+def run_reads(runs):
+    results = {}
+    with get_pool().connection() as conn:
+        for name, query in read_benchmarks():
+            results[f"read {name}"] = measure(lambda _: query(conn), runs)
+    return results
+
+def run_writes(runs, durability):
+    '''Time each write from submit() until its Future reports it committed'''
+    writes = WriteQueue(durability=durability)
+    counter = iter(range(10**9))
+
+    def write(job):
+        return writes.submit(job).result()
+
+    def new_task(_=None):
+        n = next(counter)
+        return write(lambda conn: TaskStore(conn).create(f"bench task {n}", "2030-01-01", "09:00", "benchmark", "misc", "upcoming"))
+
+    def new_habit(_=None):
+        name = f"bench habit {next(counter)}"
+        write(lambda conn: HabitStore(conn).save(name, "", "daily", "incomplete", "2030-01-01", 0, "misc"))
+        return name
+
+    def new_sleep_log(_=None):
+        # Far future dates can't collide with the fixture's past ones
+        day = (BENCH_DATES + timedelta(days=next(counter))).isoformat()
+        return write(lambda conn: SleepStore(conn).add(day, 7.5))
+
+    benchmarks = [
+        ("TaskStore.create", new_task, None),
+        ("TaskStore.update", lambda task_id: write(lambda conn: TaskStore(conn).update(task_id, f"bench edit {task_id}", "2030-01-02", None, "edited", "misc", "upcoming")), new_task),
+        ("TaskStore.mark_complete", lambda task_id: write(lambda conn: TaskStore(conn).mark_complete(task_id)), new_task),
+        ("TaskStore.delete", lambda task_id: write(lambda conn: TaskStore(conn).delete(task_id)), new_task),
+        ("HabitStore.save", new_habit, None),
+        ("HabitStore.update", lambda name: write(lambda conn: HabitStore(conn).save(name, "edited", "weekly", "complete", "2030-01-01", 100, "misc", name)), new_habit),
+        ("HabitStore.delete", lambda name: write(lambda conn: HabitStore(conn).delete(name)), new_habit),
+        ("SleepStore.add", new_sleep_log, None),
+        ("SleepStore.update", lambda log_id: write(lambda conn: SleepStore(conn).update(log_id, (EDITED_DATES + timedelta(days=log_id)).isoformat(), 8.0)), new_sleep_log),
+        ("SleepStore.delete", lambda log_id: write(lambda conn: SleepStore(conn).delete(log_id)), new_sleep_log),
+    ]
+    results = {}
+    try:
+        for name, func, setup in benchmarks:
+            results[f"write {name}"] = measure(func, runs, setup)
+    finally:
+        writes.close()
+    return results
+
+@contextlib.contextmanager
+def virtual_display():
+    '''Yield True with a usable X display, starting Xvfb if needed, or False if there is none'''
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        yield True
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        yield False
+        return
+
+    # Xvfb picks a free display number and writes it to the pipe once it accepts connections
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen([xvfb, "-displayfd", str(write_fd), "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                              pass_fds=(write_fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        display = pipe.readline().strip()
+    if not display:
+        server.kill()
+        yield False
+        return
+
+    os.environ["DISPLAY"] = f":{display}"
+    try:
+        yield True
+    finally:
+        del os.environ["DISPLAY"]
+        server.terminate()
+        server.wait()
+
+class BenchApp:
+    '''Stands in for SmartClockApp: screens only navigate through show()'''
+    def show(self, name):
+        pass
+
+def wait_for_queries(root, screen):
+    '''Run the Tk loop until every background query of screen has been shown'''
+    deadline = time.monotonic() + SCREEN_TIMEOUT_SECONDS
+    while screen.queries.pending:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{type(screen).__name__} did not finish loading")
+        root.update()
+        time.sleep(0.001)
+
+def run_screens(runs):
+    '''Time building each database screen, then each of its loads until the rows are on screen'''
+    import tkinter as tk
+    from tkinter import ttk
+    from components.habit_tracker import HabitTracker
+    from components.pomodoro import PomodoroTimer
+    from components.sleep_logger import SleepLogger
+    from components.task_manager import TaskManager
+
+    screens = [
+        (TaskManager, "load_tasks"),
+        (PomodoroTimer, "load_tasks"),
+        (HabitTracker, "load_habits"),
+        (SleepLogger, "load_logs"),
+    ]
+    root = tk.Tk()
+    root.geometry("1280x950")
+    results = {}
+    try:
+        for screen_type, load in screens:
+            name = screen_type.__name__
+            built = []
+
+            def build(_):
+                frame = ttk.Frame(root)
+                frame.pack(fill="both", expand=True)
+                built.append(screen_type(frame, BenchApp()))
+                root.update()
+
+            results[f"build {name}"] = measure(build, max(1, runs // 4))
+            for screen in built[:-1]:
+                screen.destroy()
+
+            screen = built[-1]
+            def load_and_show(_):
+                getattr(screen, load)()
+                wait_for_queries(root, screen)
+                root.update_idletasks()
+
+            results[f"screen {name}.{load}"] = measure(load_and_show, runs)
+            screen.destroy()
+    finally:
+        root.destroy()
+    return results
+
+def compare(results, baseline, tolerance, noise_ms):
+    '''Print each benchmark against the baseline and return the names that regressed'''
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            print(f"{name:45} {result['median_ms']:10.3f} ms  (new)")
+            continue
+        change = result["median_ms"] - base["median_ms"]
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        regressed = change > noise_ms and ratio > 1 + tolerance
+        print(f"{name:45} {result['median_ms']:10.3f} ms  baseline {base['median_ms']:10.3f} ms  {ratio - 1:+7.1%}{'  REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    fixtures.add_arguments(parser)
+    parser.add_argument("--fixture", help="fixture to benchmark against, generated first if it doesn't exist")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--durability", choices=DURABILITY, default=DEFAULT_DURABILITY)
+    parser.add_argument("--screens", action="store_true", help="also build the Tk screens (uses Xvfb when there is no display)")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --output")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown as a fraction of the baseline")
+    parser.add_argument("--noise-ms", type=float, default=DEFAULT_NOISE_MS)
+    args = parser.parse_args()
+
+    size = fixtures.fixture_size(args)
+    with tempfile.TemporaryDirectory() as work_dir:
+        fixture = os.path.abspath(args.fixture) if args.fixture else os.path.join(work_dir, "fixture.db")
+        if not os.path.exists(fixture):
+            print(f"Generating {fixture} ({', '.join(f'{name}={value}' for name, value in size.items())})")
+            fixtures.generate(fixture, seed=args.seed, **size)
+
+        # The app opens data/tasks.db under the working directory. Benchmark a copy, so writes leave the fixture as it was.
+        os.makedirs(os.path.join(work_dir, "data"))
+        shutil.copyfile(fixture, os.path.join(work_dir, "data", "tasks.db"))
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            results = run_reads(args.runs)
+            results.update(run_writes(args.runs, args.durability))
+            if args.screens:
+                with virtual_display() as available:
+                    if available:
+                        results.update(run_screens(args.runs))
+                    else:
+                        print("No display and no Xvfb; skipping the screen benchmarks")
+        finally:
+            close_connections()
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "fixture": args.fixture,
+            "size": size,
+            "durability": args.durability,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["meta"].get("size") != size:
+            print(f"Warning: the baseline was measured on a different fixture size: {baseline['meta'].get('size')}")
+        regressions = compare(results, baseline, args.tolerance, args.noise_ms)
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+    else:
+        for name, result in results.items():
+            print(f"{name:45} median {result['median_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms")
+
+if __name__ == "__main__":
+    main()
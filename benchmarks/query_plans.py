@@ -0,0 +1,73 @@
+'''Show the hot query plans switching from SCAN to SEARCH after the index migration.
+
+Usage: python benchmarks/query_plans.py [rows]
+'''
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.database import get_schema_version, migrate
+from components.stores import TASKS_ACTIVE
+
+HOT_QUERIES = [
+    ("task by title", "SELECT id FROM tasks WHERE title = ?", ("task 500",)),
+    ("pomodoro task list", TASKS_ACTIVE, ()),
+    ("tasks by tag", "SELECT COUNT(*) FROM tasks WHERE tag_id = ?", (3,)),
+    ("habit by name", "SELECT progress FROM habits WHERE name = ?", ("habit 500",)),
+    ("habits by category", "SELECT COUNT(*) FROM habits WHERE category_id = ?", (3,)),
+    ("latest sleep log", "SELECT hours_slept FROM sleep_logs ORDER BY date DESC LIMIT 1", ()),
+]
+
+def populate(conn, rows):
+    '''Fill a version 1 database with synthetic rows'''
+    statuses = ['completed'] * 8 + ['upcoming', 'overdue']
+    conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(f"tag {i}",) for i in range(50)])
+    conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)", [(f"category {i}",) for i in range(50)])
+    conn.executemany(
+        "INSERT INTO tasks (title, due_date, due_time, description, tag_id, status) VALUES (?, ?, ?, ?, ?, ?)",
+        ((f"task {i}", f"20{random.randint(24, 30)}-{random.randint(1, 12):02}-{random.randint(1, 28):02}",
+          f"{random.randint(0, 23):02}:{random.randint(0, 59):02}", "", random.randint(1, 50), random.choice(statuses))
+         for i in range(rows))
+    )
+    conn.executemany(
+        "INSERT INTO habits (name, description, frequency, status, start_date, progress, category_id) VALUES (?, '', 'daily', 'incomplete', '2024-01-01', 0, ?)",
+        ((f"habit {i}", random.randint(1, 50)) for i in range(rows // 10))
+    )
+    conn.executemany(
+        "INSERT INTO sleep_logs (date, hours_slept) VALUES (date('2000-01-01', ?), 7.5)",
+        ((f"+{i} days",) for i in range(rows // 10))
+    )
+    conn.commit()
+
+def report(conn, label):
+    '''Print the plan and median latency of each hot query'''
+    print(f"== {label} ==")
+    for name, sql, params in HOT_QUERIES:
+        plan = " / ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append(time.perf_counter() - start)
+        print(f"{name:20} {sorted(timings)[2] * 1000:8.2f} ms  {plan}")
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "tasks.db"))
+        migrate(conn, target=1)
+        populate(conn, rows)
+        conn.execute("ANALYZE")
+        report(conn, f"schema version 1, {rows} tasks")
+
+        migrate(conn)
+        conn.execute("ANALYZE")
+        report(conn, f"schema version {get_schema_version(conn)}, {rows} tasks")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
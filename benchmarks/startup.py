@@ -0,0 +1,61 @@
+'''Measure the import cost of starting the app with python -X importtime.
+
+Imports main (without opening a window) in a fresh interpreter, prints the
+heaviest imports and fails if the total exceeds the threshold or if a module
+that should load lazily was imported at startup.
+
+Usage: python benchmarks/startup.py [--threshold-ms MS] [--runs N] [--top N]
+'''
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_THRESHOLD_MS = 250
+# Only the screens that need these may import them
+LAZY_MODULES = ["googleapiclient", "google_auth_oauthlib", "google.auth", "plyer", "components.google_calendar"]
+
+def import_times():
+    '''Return {module: (self_us, cumulative_us)} for one cold import of main'''
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing main failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threshold-ms", type=float, default=DEFAULT_THRESHOLD_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # The fastest run is the least disturbed by the rest of the machine
+    runs = [import_times() for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times["main"][1])
+    total_ms = best["main"][1] / 1000
+
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for name, (self_us, cumulative_us) in sorted(best.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+    print(f"\nimport main: {total_ms:.1f} ms (best of {args.runs}, threshold {args.threshold_ms:.0f} ms)")
+
+    failures = [f"{name} was imported at startup" for name in LAZY_MODULES if name in best]
+    if total_ms > args.threshold_ms:
+        failures.append(f"startup imports took {total_ms:.1f} ms, over the {args.threshold_ms:.0f} ms threshold")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,27 @@
-# Initialize all feeatures and organize them in a single module
-
-from .google_calendar import *
-from .pomodoro import *
-from .simple_timers import *
-from .sleep_logger import *
-from .task_manager import *
-from .habit_tracker import *
\ No newline at end of file
+# Initialize all feeatures and organize them in a single module.
+# Each screen's module is imported the first time the screen is used, so heavy
+# dependencies (e.g. the Google API client for the calendar) never load in
+# sessions that don't open that screen.
+import importlib
+
+_SCREEN_MODULES = {
+    "GoogleCalendarIntegration": ".google_calendar",
+    "PomodoroTimer": ".pomodoro",
+    "SimpleTimers": ".simple_timers",
+    "SleepLogger": ".sleep_logger",
+    "TaskManager": ".task_manager",
+    "HabitTracker": ".habit_tracker",
+}
+
+__all__ = list(_SCREEN_MODULES)
+
+def __getattr__(name):
+    module_name = _SCREEN_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip this hook
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from .database import get_db_path, migrate
+from .name_cache import category_cache, tag_cache
+from .task_status import wake_status_engine
+from .write_queue import get_write_queue
+
+KEEP_SNAPSHOTS = 7
+PAGES_PER_STEP = 256  # 1 MB per step with the default 4 KB pages
+STEP_SLEEP = 0.005  # Seconds to yield between steps
+
+_busy = threading.Lock()  # One backup or restore at a time
+
+def get_backup_dir():
+    '''Return the snapshot directory next to the database, creating it if needed'''
+    backup_dir = os.path.join(os.path.dirname(get_db_path()), "backups")
+    os.makedirs(backup_dir, exist_ok=True)
+    return backup_dir
+
+def list_snapshots():
+    '''Return the paths of every snapshot, newest first'''
+    backup_dir = get_backup_dir()
+    names = [name for name in os.listdir(backup_dir) if name.startswith("tasks-") and name.endswith(".db")]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+def prune_snapshots(keep=KEEP_SNAPSHOTS):
+    '''Delete all but the newest keep snapshots'''
+    for path in list_snapshots()[keep:]:
+        os.remove(path)
+
+def create_snapshot(progress=None):
+    '''Copy the live database into a new snapshot and return its path.
+
+    The copy is made with the online backup API in small steps under a single
+    read transaction. In WAL mode that snapshot stays consistent while the app
+    keeps committing, so the backup never restarts and never blocks writers.
+    '''
+    # Microseconds keep two snapshots taken within the same second apart
+    path = os.path.join(get_backup_dir(), f"tasks-{datetime.now():%Y%m%d-%H%M%S-%f}.db")
+    partial = f"{path}.part"
+
+    source = sqlite3.connect(get_db_path(), isolation_level=None)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # Pin the read snapshot
+        target = sqlite3.connect(partial)
+        try:
+            source.backup(target, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP)
+            # Make the snapshot a single self-contained file
+            target.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            target.close()
+        source.execute("COMMIT")
+    except BaseException:
+        # list_snapshots() never sees .part files, so they would never be pruned
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        source.close()
+
+    # Only complete snapshots ever carry the final name
+    os.replace(partial, path)
+    prune_snapshots()
+    return path
+
+def restore_snapshot(path, progress=None):
+    '''Replace the contents of the live database with a snapshot.
+
+    Queued writes are committed first. Older snapshots are migrated to the
+    current schema after the copy.
+    '''
+    get_write_queue().close()  # It restarts on the next write
+
+    source = sqlite3.connect(path)
+    target = sqlite3.connect(get_db_path())
+    try:
+        source.backup(target, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP)
+        migrate(target)
+    finally:
+        target.close()
+        source.close()
+
+    # The restored tables have different ids
+    tag_cache.invalidate()
+    category_cache.invalidate()
+    # Overdue statuses and the next due time come from the restored tasks now
+    wake_status_engine()
+
+def in_background(func, *args):
+    '''Run a backup or restore on its own thread and return a Future for its result'''
+    future = Future()
+
+    def run():
+        if not _busy.acquire(blocking=False):
+            future.set_exception(RuntimeError("A backup or restore is already running."))
+            return
+        try:
+            if future.set_running_or_notify_cancel():
+                future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            _busy.release()
+
+    threading.Thread(target=run, name="db-backup", daemon=True).start()
+    return future
@@ -0,0 +1,355 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from .query_stats import connection_factory, write_report
+
+# Each migration is (version, description, statements). Versions are applied in order,
+# once per database, and recorded in schema_version. Never edit a released migration;
+# append a new one instead.
+# Also recreated by TaskStore.deferred_search_index() after a bulk insert
+TASKS_FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts (rowid, title, description, tag)
+        VALUES (new.id, new.title, new.description, (SELECT name FROM tags WHERE id = new.tag_id));
+    END
+'''
+
+MIGRATIONS = [
+    (1, "Base tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT UNIQUE NOT NULL,
+            due_date TEXT NOT NULL,
+            due_time TEXT,
+            description TEXT,
+            tag_id INTEGER,
+            status TEXT CHECK(status IN ('completed', 'upcoming', 'overdue')) NOT NULL,
+            FOREIGN KEY (tag_id) REFERENCES tags (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS habits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            frequency TEXT CHECK(frequency IN ('daily', 'weekly', 'monthly', 'yearly')) NOT NULL,
+            status TEXT CHECK(status IN ('incomplete', 'partially_completed', 'halfway_completed', 'mostly_completed', 'complete')) NOT NULL,
+            start_date TEXT NOT NULL,
+            progress INTEGER NOT NULL,
+            category_id INTEGER NOT NULL,
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sleep_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL UNIQUE,
+            hours_slept REAL NOT NULL
+        )
+        ''',
+        # Ensure the 'misc' tag and category exist, and only create them if they don't
+        "INSERT OR IGNORE INTO tags (name) VALUES ('misc')",
+        "INSERT OR IGNORE INTO categories (name) VALUES ('misc')",
+    ]),
+    (2, "Secondary indexes for the hot lookups", [
+        # Pomodoro task list and overdue checks filter on status and order by due date.
+        # The other task columns they read are included, so the index covers them and the table is never scanned
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status_due ON tasks (status, due_date, due_time, title, description, tag_id)",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_tag_id ON tasks (tag_id)",
+        "CREATE INDEX IF NOT EXISTS idx_habits_name ON habits (name)",
+        "CREATE INDEX IF NOT EXISTS idx_habits_category_id ON habits (category_id)",
+        # tasks.title, tags.name, categories.name and sleep_logs.date are UNIQUE and already indexed
+    ]),
+    (3, "Full-text search over tasks", [
+        # rowid mirrors tasks.id. The prefix indexes keep search-as-you-type prefix queries fast.
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(title, description, tag, prefix='2 3')",
+        '''
+        INSERT INTO tasks_fts (rowid, title, description, tag)
+        SELECT tasks.id, tasks.title, tasks.description, tags.name
+        FROM tasks
+        LEFT JOIN tags ON tasks.tag_id = tags.id
+        ''',
+        TASKS_FTS_INSERT_TRIGGER,
+        '''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            DELETE FROM tasks_fts WHERE rowid = old.id;
+        END
+        ''',
+        # Status changes don't touch the index, so the overdue engine stays cheap
+        '''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, tag_id ON tasks BEGIN
+            UPDATE tasks_fts
+            SET title = new.title, description = new.description, tag = (SELECT name FROM tags WHERE id = new.tag_id)
+            WHERE rowid = new.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS tags_fts_rename AFTER UPDATE OF name ON tags BEGIN
+            UPDATE tasks_fts SET tag = new.name WHERE rowid IN (SELECT id FROM tasks WHERE tag_id = new.id);
+        END
+        ''',
+    ]),
+    (4, "Pomodoro session history with daily, weekly and per-tag rollups", [
+        # One row per completed interval. tag_id is the task's tag when the interval was recorded,
+        # so the per-tag totals don't change when a task is retagged or deleted.
+        '''
+        CREATE TABLE IF NOT EXISTS pomodoro_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            phase TEXT CHECK(phase IN ('work', 'short break', 'long break')) NOT NULL,
+            started_at TEXT NOT NULL,
+            ended_at TEXT NOT NULL,
+            seconds INTEGER NOT NULL,
+            task_id INTEGER,
+            tag_id INTEGER,
+            FOREIGN KEY (task_id) REFERENCES tasks (id),
+            FOREIGN KEY (tag_id) REFERENCES tags (id)
+        )
+        ''',
+        # The rollups are kept up to date by the triggers below, so stats never scan the history.
+        # Weeks are keyed by the date of their Monday.
+        '''
+        CREATE TABLE IF NOT EXISTS pomodoro_daily (
+            day TEXT PRIMARY KEY,
+            work_sessions INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL,
+            break_sessions INTEGER NOT NULL,
+            break_seconds INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pomodoro_weekly (
+            week TEXT PRIMARY KEY,
+            work_sessions INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL,
+            break_sessions INTEGER NOT NULL,
+            break_seconds INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS pomodoro_tag_totals (
+            tag_id INTEGER PRIMARY KEY,
+            work_sessions INTEGER NOT NULL,
+            work_seconds INTEGER NOT NULL,
+            FOREIGN KEY (tag_id) REFERENCES tags (id)
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS pomodoro_sessions_rollup_insert AFTER INSERT ON pomodoro_sessions BEGIN
+            INSERT INTO pomodoro_daily (day, work_sessions, work_seconds, break_sessions, break_seconds)
+            VALUES (date(new.started_at), new.phase = 'work', CASE WHEN new.phase = 'work' THEN new.seconds ELSE 0 END,
+                    new.phase != 'work', CASE WHEN new.phase != 'work' THEN new.seconds ELSE 0 END)
+            ON CONFLICT (day) DO UPDATE SET
+                work_sessions = work_sessions + excluded.work_sessions, work_seconds = work_seconds + excluded.work_seconds,
+                break_sessions = break_sessions + excluded.break_sessions, break_seconds = break_seconds + excluded.break_seconds;
+
+            INSERT INTO pomodoro_weekly (week, work_sessions, work_seconds, break_sessions, break_seconds)
+            VALUES (date(new.started_at, 'weekday 0', '-6 days'), new.phase = 'work', CASE WHEN new.phase = 'work' THEN new.seconds ELSE 0 END,
+                    new.phase != 'work', CASE WHEN new.phase != 'work' THEN new.seconds ELSE 0 END)
+            ON CONFLICT (week) DO UPDATE SET
+                work_sessions = work_sessions + excluded.work_sessions, work_seconds = work_seconds + excluded.work_seconds,
+                break_sessions = break_sessions + excluded.break_sessions, break_seconds = break_seconds + excluded.break_seconds;
+
+            INSERT INTO pomodoro_tag_totals (tag_id, work_sessions, work_seconds)
+            SELECT new.tag_id, 1, new.seconds WHERE new.phase = 'work' AND new.tag_id IS NOT NULL
+            ON CONFLICT (tag_id) DO UPDATE SET
+                work_sessions = work_sessions + 1, work_seconds = work_seconds + excluded.work_seconds;
+        END
+        ''',
+        # Keeps the rollups right if old history is ever pruned
+        '''
+        CREATE TRIGGER IF NOT EXISTS pomodoro_sessions_rollup_delete AFTER DELETE ON pomodoro_sessions BEGIN
+            UPDATE pomodoro_daily SET
+                work_sessions = work_sessions - (old.phase = 'work'), work_seconds = work_seconds - CASE WHEN old.phase = 'work' THEN old.seconds ELSE 0 END,
+                break_sessions = break_sessions - (old.phase != 'work'), break_seconds = break_seconds - CASE WHEN old.phase != 'work' THEN old.seconds ELSE 0 END
+            WHERE day = date(old.started_at);
+
+            UPDATE pomodoro_weekly SET
+                work_sessions = work_sessions - (old.phase = 'work'), work_seconds = work_seconds - CASE WHEN old.phase = 'work' THEN old.seconds ELSE 0 END,
+                break_sessions = break_sessions - (old.phase != 'work'), break_seconds = break_seconds - CASE WHEN old.phase != 'work' THEN old.seconds ELSE 0 END
+            WHERE week = date(old.started_at, 'weekday 0', '-6 days');
+
+            UPDATE pomodoro_tag_totals SET work_sessions = work_sessions - 1, work_seconds = work_seconds - old.seconds
+            WHERE old.phase = 'work' AND tag_id = old.tag_id;
+        END
+        ''',
+    ]),
+]
+
+def get_db_path():
+    '''Return the path to the application database, creating its directory if needed'''
+    db_dir = os.path.join(os.getcwd(), "data")
+    os.makedirs(db_dir, exist_ok=True)
+    return f"{db_dir}/tasks.db"
+
+def get_schema_version(conn):
+    '''Return the newest migration version applied to the database'''
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+
+def migrate(conn, target=None):
+    '''Apply every pending migration up to target (default: all) to an open connection.
+
+    Databases created before schema_version existed start at version 0, and the
+    base migration only uses IF NOT EXISTS, so they are upgraded in place.
+    '''
+    current = get_schema_version(conn)
+    conn.commit()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current or (target is not None and version > target):
+            continue
+
+        # Run each migration in its own transaction so a failure leaves the previous version intact.
+        # Take the write lock up front and re-check, in case another connection migrated meanwhile.
+        conn.execute("BEGIN IMMEDIATE")
+        if (conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0) >= version:
+            conn.rollback()
+            continue
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.now().isoformat(timespec="seconds"))
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+# Connection tuning applied to every connection the app opens
+CACHED_STATEMENTS = 256
+PRAGMAS = [
+    # WAL lets the UI keep reading while the writer thread commits, and commits skip the fsync
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",  # 16 MB page cache
+    "PRAGMA temp_store = MEMORY",
+]
+POOL_SIZE = 4
+
+_schema_lock = threading.Lock()
+_schema_ready = set()  # Database paths migrated by this process
+_main_conn = None
+_pool = None
+
+def connect(path=None, check_same_thread=True):
+    '''Open a tuned connection and make sure the schema is current'''
+    path = path or get_db_path()
+    conn = sqlite3.connect(path, factory=connection_factory(), cached_statements=CACHED_STATEMENTS, check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    ensure_schema(conn, path)
+    return conn
+
+def ensure_schema(conn, path):
+    '''Run the migrations once per database per process'''
+    with _schema_lock:
+        if path not in _schema_ready:
+            migrate(conn)
+            _schema_ready.add(path)
+
+def get_connection():
+    '''Return the shared main-thread connection, opening it on first use.
+
+    Screens borrow this connection and must not close it.
+    '''
+    global _main_conn
+    if _main_conn is None:
+        _main_conn = connect()
+    return _main_conn
+
+class ConnectionPool:
+    '''A small pool of connections for background threads'''
+    def __init__(self, size=POOL_SIZE, path=None):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        '''Borrow a connection for the duration of a with block'''
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self):
+        '''Take an idle connection, open a new one while under size, or wait for one'''
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return connect(self.path, check_same_thread=False)
+            except Exception:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        return self.idle.get()
+
+    def release(self, conn):
+        '''Return a connection, discarding any transaction left open'''
+        if conn.in_transaction:
+            conn.rollback()
+        self.idle.put(conn)
+
+    def close(self):
+        '''Close every idle connection'''
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self.lock:
+                self.opened -= 1
+
+def get_pool():
+    '''Return the shared background connection pool'''
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool()
+    return _pool
+
+def close_connections():
+    '''Close the shared connections when the app exits'''
+    global _main_conn
+    try:
+        write_report(_main_conn)
+    finally:
+        if _main_conn is not None:
+            _main_conn.close()
+            _main_conn = None
+        if _pool is not None:
+            _pool.close()
@@ -0,0 +1,89 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from .database import get_pool
+from .profiling import traced
+
+READ_WORKERS = 2
+
+class DbExecutor:
+    '''Runs read queries on worker threads, each with a connection borrowed from the pool'''
+    def __init__(self, pool=None, workers=READ_WORKERS):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-read")
+
+    def submit(self, query):
+        '''Run query(conn) in the background and return a Future for its result'''
+        return self.executor.submit(self.run, query)
+
+    def run(self, query):
+        with (self.pool or get_pool()).connection() as conn:
+            return query(conn)
+
+    def shutdown(self):
+        '''Drop queued queries and wait for the running ones'''
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+class QueryGroup:
+    '''The background queries one screen is waiting on.
+
+    A query started under a key replaces any older query with that key, so
+    only the newest result is delivered. cancel() drops everything when the
+    screen goes away. Callbacks always run on the Tk main loop, and a query
+    that fails with sqlite3.Error is passed to its on_error callback instead.
+    '''
+    def __init__(self, executor, dispatcher):
+        self.executor = executor
+        self.dispatcher = dispatcher
+        self.pending = {}
+
+    def run(self, key, query, callback, on_error=None):
+        '''Run query(conn) in the background, then call callback(result) or on_error(error) on the main loop'''
+        stale = self.pending.get(key)
+        if stale is not None:
+            stale.cancel()
+
+        future = self.executor.submit(traced(query, name=f"query {key}", category="query"))
+        self.pending[key] = future
+        self.dispatcher.when_done(future, lambda done: self.deliver(key, done, callback, on_error))
+
+    def deliver(self, key, future, callback, on_error):
+        # Results of replaced or cancelled queries are dropped
+        if self.pending.get(key) is not future:
+            return
+        del self.pending[key]
+        try:
+            result = future.result()
+        except sqlite3.Error as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        callback(result)
+
+    def cancel(self, key=None):
+        '''Cancel the query under key, or every outstanding query, and return whether any was pending.
+
+        Results of queries that are already running are ignored.
+        '''
+        keys = list(self.pending) if key is None else [key]
+        dropped = False
+        for key in keys:
+            future = self.pending.pop(key, None)
+            if future is not None:
+                future.cancel()
+                dropped = True
+        return dropped
+
+_executor = None
+
+def get_executor():
+    '''Return the shared read executor'''
+    global _executor
+    if _executor is None:
+        _executor = DbExecutor()
+    return _executor
+
+def shutdown_executor():
+    '''Stop the shared read executor, if it was used'''
+    if _executor is not None:
+        _executor.shutdown()
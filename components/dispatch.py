@@ -0,0 +1,51 @@
+import queue
+import sys
+
+# How often the main loop checks for finished work while some is still outstanding
+POLL_MS = 20
+
+class TkDispatcher:
+    '''Hands results from worker threads back to the Tk main loop.
+
+    Worker threads only touch a thread-safe queue. The main loop drains it with
+    after(), and only while a result is still expected, so an idle app
+    schedules nothing.
+    '''
+    def __init__(self, root):
+        self.root = root
+        self.results = queue.SimpleQueue()
+        self.expected = 0  # Only touched on the main thread
+        self.poll_id = None
+
+    def when_done(self, future, callback):
+        '''Call callback(future) on the main loop once future has finished'''
+        self.expected += 1
+        future.add_done_callback(lambda done: self.results.put((callback, done)))
+        if self.poll_id is None:
+            self.poll_id = self.root.after(POLL_MS, self.drain)
+
+    def drain(self):
+        '''Run the callbacks for every finished future'''
+        self.poll_id = None
+        while True:
+            try:
+                callback, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.expected -= 1
+            try:
+                callback(future)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+        if self.expected > 0:
+            self.poll_id = self.root.after(POLL_MS, self.drain)
+
+_dispatcher = None
+
+def get_dispatcher(root):
+    '''Return the dispatcher for the application window'''
+    global _dispatcher
+    if _dispatcher is None or _dispatcher.root is not root:
+        _dispatcher = TkDispatcher(root)
+    return _dispatcher
@@ -0,0 +1,38 @@
+'''Time formatting for list views.
+
+There are only 1440 distinct HH:MM values, so the 12-hour renderings are
+precomputed once instead of calling strptime/strftime for every row.
+Inputs that aren't in canonical form (e.g. '9:5 PM' from the spinboxes)
+fall back to a bounded memo around strptime.
+'''
+from datetime import datetime
+from functools import lru_cache
+
+# '13:05' -> '01:05 PM'
+TIME_24_TO_12 = {
+    f"{hour:02}:{minute:02}": f"{hour % 12 or 12:02}:{minute:02} {'AM' if hour < 12 else 'PM'}"
+    for hour in range(24) for minute in range(60)
+}
+# '01:05 PM' -> '13:05'
+TIME_12_TO_24 = {twelve: twenty_four for twenty_four, twelve in TIME_24_TO_12.items()}
+
+@lru_cache(maxsize=2048)
+def _parse_time(time_str, parse_format, output_format):
+    try:
+        return datetime.strptime(time_str, parse_format).strftime(output_format)
+    except ValueError:
+        return None
+
+def to_12_hour(time_str, default=None):
+    '''Convert 'HH:MM' to 'hh:MM AM/PM', or return default if it isn't a valid time'''
+    result = TIME_24_TO_12.get(time_str)
+    if result is None:
+        result = _parse_time(time_str, "%H:%M", "%I:%M %p")
+    return default if result is None else result
+
+def to_24_hour(time_str, default=None):
+    '''Convert 'hh:MM AM/PM' to 'HH:MM', or return default if it isn't a valid time'''
+    result = TIME_12_TO_24.get(time_str)
+    if result is None:
+        result = _parse_time(time_str, "%I:%M %p", "%H:%M")
+    return default if result is None else result
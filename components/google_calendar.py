@@ -6,12 +6,16 @@ from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 import pickle
+from .screens import Screen
 
-class GoogleCalendarIntegration:
-    def __init__(self, root):
-        self.root = root
-        self.root['background'] = '#ffdfba'
-        self.root.minsize(width=1280, height=950)
+class GoogleCalendarIntegration(Screen):
+    background = '#ffdfba'
+    min_size = (1280, 950)
+    button_background = '#ffa07a'
+    button_width = 20
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
         self.service = self.authenticate_google_calendar()
         self.create_ui()
 
@@ -34,19 +38,13 @@ class GoogleCalendarIntegration:
 
     def create_ui(self):
         '''Create the Google Calendar integration UI.'''
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#ffdfba')
-
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffa07a', relief='solid', font=('Arial', 18), width=20)
-
-        home_button = ttk.Button(self.root, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
+        home_button = ttk.Button(self.frame, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
 
         # Split UI into left and right frames
-        self.left_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.left_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.left_frame.pack(side="left", fill="y", padx=30, pady=30)
 
-        self.right_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.right_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.right_frame.pack(side="right", expand=True, fill="both", padx=10, pady=10)
 
         ttk.Label(self.left_frame, text="Google Calendar Integration", background='#ffdfba', font=("Arial", 24)).pack(pady=20)
@@ -64,15 +62,14 @@ class GoogleCalendarIntegration:
         self.event_tree.column("ID", width=100, stretch=tk.NO)
         self.event_tree.pack(expand=True, fill="both", pady=10)
 
+    def on_show(self):
+        '''Refresh the events on every visit, since they can change outside the app.'''
+        super().on_show()
         self.load_events()
 
     def return_to_home(self):
         '''Return to the home screen.'''
-        from main import SmartClockApp
-        self.root.destroy()
-        root = tk.Tk()
-        SmartClockApp(root)
-        root.mainloop()
+        self.app.show("home")
 
     def load_events(self):
         '''Load events from Google Calendar.'''
@@ -1,96 +1,76 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
-import os
 import sqlite3
+from datetime import datetime
+from .database import get_connection
+from .db_executor import QueryGroup, get_executor
+from .dispatch import get_dispatcher
+from .screens import Screen
+from .stores import HabitStore
+from .write_queue import get_write_queue
 
-class HabitTracker:
-    def __init__(self, root):
-        self.root = root
-        self.root['background'] = '#20ffc0'
-        self.root.minsize(width=1280, height=950)
+class HabitTracker(Screen):
+    background = '#20ffc0'
+    min_size = (1280, 950)
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
 
         # Initialize database
         self.conn = None
-        self.cursor = None
+        self.habits = None
+        self.writes = get_write_queue()
+        self.ui = get_dispatcher(self.root)
+        self.queries = QueryGroup(get_executor(), self.ui)
         self.open_db_conn()
 
         self.create_habit_tracker_ui()
 
     def open_db_conn(self):
-        '''Open and initialize the database'''
+        '''Borrow the shared database connection. The schema is set up once per process'''
         if self.conn is None:
-            db_dir = os.path.join(os.getcwd(), "data")
-            self.conn = sqlite3.connect(f"{db_dir}/tasks.db")
-            self.cursor = self.conn.cursor()
-            self.setup_database()
+            self.conn = get_connection()
+            self.habits = HabitStore(self.conn)
 
     def close_db_conn(self):
-        '''Close the connection to the SQLite database.'''
+        '''Release the shared connection. It stays open for the next screen'''
+        self.queries.cancel()
         if self.conn:
-            self.conn.close()
             self.conn = None
-            self.cursor = None
+            self.habits = None
+
+    def on_show(self):
+        '''Reload the habits only if the data changed while the screen was hidden'''
+        super().on_show()
+        if self.data_changed():
+            self.load_habits()
+
+    def on_hide(self):
+        if self.queries.cancel():
+            self.forget_data_version()
+
+    def destroy(self):
+        super().destroy()
+        self.close_db_conn()
 
     def return_to_home(self):
-        from main import SmartClockApp
         '''Return to the home screen'''
-        self.close_db_conn()
-        SmartClockApp(self.root)
-
-    def setup_database(self):
-        '''Create tables if they do not exist'''
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
-        
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS habits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                frequency TEXT CHECK(frequency IN ('daily', 'weekly', 'monthly', 'yearly')) NOT NULL,
-                status TEXT CHECK(status IN ('incomplete', 'partially_completed', 'halfway_completed', 'mostly_completed', 'complete')) NOT NULL,
-                start_date TEXT NOT NULL,
-                progress INTEGER NOT NULL,
-                category_id INTEGER NOT NULL,
-                FOREIGN KEY (category_id) REFERENCES categories(id)
-            )
-        ''')
-        
-        self.cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES ('misc')")
-        self.conn.commit()
-
-    def clear_window(self):
-        '''Clear all widgets in the window'''
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        self.reset_left_frame()
+        self.app.show("home")
 
     def create_habit_tracker_ui(self):
         '''Create the habit tracker UI'''
-
-        self.clear_window()
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#20ffc0')
-
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
-
-        home_button = ttk.Button(self.root, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
+        home_button = ttk.Button(self.frame, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
 
         # Split UI into left and right frames
-        self.left_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.left_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.left_frame.pack(side="left", fill="y", padx=30, pady=30)
 
-        self.right_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.right_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.right_frame.pack(side="right", expand=True, fill="both", padx=10, pady=10)
 
         # New habit interface
-        self.new_habit_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Create New Habit", command=self.render_habit_form)
-        self.new_habit_button.pack(pady=20)
+        self.reset_left_frame()
 
         # Habit list on the right
         habit_frame = ttk.Frame(self.right_frame, style='Custom.TFrame')
@@ -125,8 +105,12 @@ class HabitTracker:
         ttk.Button(button_frame, text="Update Habit", style='Custom.TButton', command=self.update_habit).pack(side="left", padx=10)
         ttk.Button(button_frame, text="Delete Habit", style='Custom.TButton', command=self.delete_habit).pack(side="left", padx=10)
 
-        # Load habits into the treeview
-        self.load_habits()
+    def reset_left_frame(self):
+        '''Close any open form and show the new habit button'''
+        for widget in self.left_frame.winfo_children():
+            widget.destroy()
+        self.new_habit_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Create New Habit", command=self.render_habit_form)
+        self.new_habit_button.pack(pady=20)
 
     def render_habit_form(self, habit=None):
         '''Render the form for creating or updating a habit'''
@@ -179,7 +163,7 @@ class HabitTracker:
         btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
 
         ttk.Button(button_frame, style='Custom.TButton', text="Save Habit", command=lambda: self.save_habit(habit)).pack(pady=10)
-        ttk.Button(button_frame, style='Custom.TButton', text="Back", command=self.create_habit_tracker_ui).pack(side=tk.LEFT, padx=20)
+        ttk.Button(button_frame, style='Custom.TButton', text="Back", command=self.reset_left_frame).pack(side=tk.LEFT, padx=20)
 
     def create_date_incrementer(self, frame):
         '''Create a date incrementer with spinboxes for month, day, and year'''
@@ -202,9 +186,7 @@ class HabitTracker:
 
     def load_categories(self):
         '''Load categories into the dropdown'''
-        self.cursor.execute("SELECT name FROM categories")
-        categories = [row[0] for row in self.cursor.fetchall()]
-        self.category_dropdown['values'] = categories
+        self.category_dropdown['values'] = self.habits.category_names()
 
     def add_category(self):
         '''Add a new category to the database'''
@@ -213,10 +195,19 @@ class HabitTracker:
             messagebox.showerror("Error", "Category name cannot be empty.")
             return
 
-        self.cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category_name,))
-        self.conn.commit()
-        messagebox.showinfo("Success", f"Category '{category_name}' added successfully.")
-        self.load_categories()
+        future = self.writes.submit(lambda conn: HabitStore(conn).add_category(category_name))
+        self.ui.when_done(future, lambda done: self.on_category_added(done, category_name))
+
+    def on_category_added(self, future, category_name):
+        '''Confirm a new category once it is committed'''
+        try:
+            future.result()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to add category: {e}")
+        else:
+            messagebox.showinfo("Success", f"Category '{category_name}' added successfully.")
+        if self.conn is not None and self.category_dropdown.winfo_exists():
+            self.load_categories()
 
     def save_habit(self, habit=None):
         '''Save a new habit or update an existing one in the database'''
@@ -241,40 +232,35 @@ class HabitTracker:
         }
         progress = status_to_progress.get(status, 0)
 
-        # Handle category
-        self.cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,))
-        self.conn.commit()
-        self.cursor.execute("SELECT id FROM categories WHERE name = ?", (category,))
-        category_id = self.cursor.fetchone()[0]
-
-        if habit:
-            # Update existing habit
-            self.cursor.execute('''
-                UPDATE habits
-                SET name = ?, description = ?, frequency = ?, status = ?, start_date = ?, progress = ?, category_id = ?
-                WHERE name = ?
-            ''', (name, description, frequency, status, start_date, progress, category_id, habit[0]))
-        else:
-            # Save new habit
-            self.cursor.execute('''
-                INSERT INTO habits (name, description, frequency, status, start_date, progress, category_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (name, description, frequency, status, start_date, progress, category_id))
+        # Insert a new habit or update the existing one. A new category is committed together with the habit.
+        original_name = habit[0] if habit else None
+        future = self.writes.submit(lambda conn: HabitStore(conn).save(name, description, frequency, status, start_date, progress, category, original_name))
+        self.ui.when_done(future, self.on_habits_changed)
 
-        self.conn.commit()
-        self.load_habits()
+    def on_habits_changed(self, future):
+        '''Reload the habit list once a change is committed, or after it failed and was rolled back'''
+        try:
+            future.result()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to save habit changes: {e}")
+        if self.conn is not None:
+            self.load_habits()
 
     def load_habits(self):
-        '''Load habits into the treeview'''
+        '''Load habits into the treeview in the background'''
+        self.habit_tree.configure(cursor="watch")
+        self.queries.run("habits", lambda conn: HabitStore(conn).all(), self.show_habits, self.on_habits_failed)
+
+    def on_habits_failed(self, error):
+        self.habit_tree.configure(cursor="")
+        messagebox.showerror("Error", f"Failed to load habits: {error}")
+
+    def show_habits(self, habits):
+        self.habit_tree.configure(cursor="")
         for row in self.habit_tree.get_children():
             self.habit_tree.delete(row)
 
-        self.cursor.execute('''
-            SELECT habits.name, habits.frequency, habits.status, habits.start_date, categories.name
-            FROM habits
-            LEFT JOIN categories ON habits.category_id = categories.id
-        ''')
-        for habit in self.cursor.fetchall():
+        for habit in habits:
             self.habit_tree.insert("", "end", values=habit)
 
     def view_description(self):
@@ -285,8 +271,7 @@ class HabitTracker:
             return
 
         habit_name = self.habit_tree.item(selected_item)['values'][0]
-        self.cursor.execute("SELECT description FROM habits WHERE name = ?", (habit_name,))
-        description = self.cursor.fetchone()[0]
+        description = self.habits.description(habit_name)
 
         description_window = tk.Toplevel(self.root)
         description_window.title("Habit Description")
@@ -300,14 +285,21 @@ class HabitTracker:
         '''Show the progress of a selected habit'''
         selected_item = self.habit_tree.selection()
         if not selected_item:
+            self.queries.cancel("progress")
             self.progress_label.config(text="Progress: 0%")
             self.progress_bar['value'] = 0
             return
 
         habit_name = self.habit_tree.item(selected_item)['values'][0]
-        self.cursor.execute("SELECT progress FROM habits WHERE name = ?", (habit_name,))
-        progress = self.cursor.fetchone()[0]
+        self.progress_label.config(text="Progress: ...")
+        self.queries.run("progress", lambda conn: HabitStore(conn).progress(habit_name), self.show_habit_progress, self.on_progress_failed)
+
+    def on_progress_failed(self, error):
+        self.show_habit_progress(0)
+        messagebox.showerror("Error", f"Failed to load habit progress: {error}")
 
+    def show_habit_progress(self, progress):
+        progress = progress or 0
         self.progress_label.config(text=f"Progress: {progress}%")
         self.progress_bar['value'] = progress
 
@@ -329,6 +321,5 @@ class HabitTracker:
             return
 
         habit_name = self.habit_tree.item(selected_item)['values'][0]
-        self.cursor.execute("DELETE FROM habits WHERE name = ?", (habit_name,))
-        self.conn.commit()
-        self.load_habits()
\ No newline at end of file
+        future = self.writes.submit(lambda conn: HabitStore(conn).delete(habit_name))
+        self.ui.when_done(future, self.on_habits_changed)
\ No newline at end of file
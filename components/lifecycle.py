@@ -0,0 +1,42 @@
+import threading
+import traceback
+
+class Services:
+    '''Starts the app's background services once and stops them in reverse order.
+
+    Each service is a name with a start and a stop callable. Starting a
+    name that is already running does nothing, so callers never have to
+    track whether a service is up. Services that start themselves on first
+    use (like the write queue) are registered with start=None, so their stop
+    still runs at shutdown.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = []  # (name, stop), in start order
+
+    def start(self, name, start, stop=None):
+        '''Call start() unless name is already running, and remember stop() for shutdown'''
+        with self.lock:
+            if any(running == name for running, _ in self.running):
+                return
+            if start is not None:
+                start()
+            self.running.append((name, stop))
+
+    def is_running(self, name):
+        with self.lock:
+            return any(running == name for running, _ in self.running)
+
+    def stop(self):
+        '''Stop every running service, newest first. Safe to call more than once'''
+        with self.lock:
+            running, self.running = self.running, []
+        for name, stop in reversed(running):
+            if stop is None:
+                continue
+            try:
+                stop()
+            except Exception:
+                # Keep going, so one faulty service can't stop the others from closing
+                print(f"Error stopping {name}:")
+                traceback.print_exc()
@@ -0,0 +1,71 @@
+import threading
+
+class NameCache:
+    '''In-process name -> id map for a lookup table with a UNIQUE name column.
+
+    The cache is loaded from the table once and updated as names are inserted,
+    so resolving a known name costs no queries whichever connection asks.
+    When PRAGMA data_version shows another connection committed since a
+    connection last looked, the table's row count and highest id are compared
+    with the cache and the names are only reloaded if they differ.
+    '''
+    def __init__(self, table):
+        self.table = table
+        self.ids = None
+        self.lock = threading.Lock()
+        self.versions = {}
+
+    def warm(self, conn):
+        '''Reload every name from the table'''
+        self.ids = {name: row_id for row_id, name in conn.execute(f"SELECT id, name FROM {self.table}")}
+
+    def invalidate(self):
+        '''Forget all names, e.g. after a rollback discarded inserted rows'''
+        with self.lock:
+            self.ids = None
+            self.versions = {}
+
+    def refresh(self, conn):
+        '''Load the names if they are missing or the table changed behind the cache'''
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self.ids is None:
+            self.warm(conn)
+        elif self.versions.get(conn) != version:
+            count, top = conn.execute(f"SELECT count(*), max(id) FROM {self.table}").fetchone()
+            if (count, top) != (len(self.ids), max(self.ids.values(), default=None)):
+                self.warm(conn)
+        self.versions[conn] = version
+
+    def names(self, conn):
+        '''Return every name'''
+        with self.lock:
+            self.refresh(conn)
+            return list(self.ids)
+
+    def id_for(self, conn, name):
+        '''Return the id for name, inserting it if needed. The insert is left for the caller to commit'''
+        with self.lock:
+            self.refresh(conn)
+            if name not in self.ids:
+                cursor = conn.execute(f"INSERT OR IGNORE INTO {self.table} (name) VALUES (?)", (name,))
+                if cursor.rowcount:
+                    self.ids[name] = cursor.lastrowid
+                else:
+                    self.ids[name] = conn.execute(f"SELECT id FROM {self.table} WHERE name = ?", (name,)).fetchone()[0]
+            return self.ids[name]
+
+    def ids_for(self, conn, names):
+        '''Return a dict of ids for many names, inserting the missing ones in one batch'''
+        with self.lock:
+            self.refresh(conn)
+            missing = [name for name in names if name not in self.ids]
+            if missing:
+                conn.executemany(f"INSERT OR IGNORE INTO {self.table} (name) VALUES (?)", [(name,) for name in missing])
+                placeholders = ", ".join("?" * len(missing))
+                for row_id, name in conn.execute(f"SELECT id, name FROM {self.table} WHERE name IN ({placeholders})", missing):
+                    self.ids[name] = row_id
+            return {name: self.ids[name] for name in names}
+
+# Shared by every screen
+tag_cache = NameCache("tags")
+category_cache = NameCache("categories")
@@ -0,0 +1,146 @@
+import threading
+import time
+import traceback
+
+# Minimum seconds between two notifications of the same category
+MIN_INTERVAL_SECONDS = 10
+# Per-category overrides of MIN_INTERVAL_SECONDS
+CATEGORY_INTERVALS = {}
+# A notification identical to the last one shown in its category within this many seconds is dropped
+DUPLICATE_WINDOW_SECONDS = 60
+# Attempts to show a notification before giving up, and the delay before the first retry (doubled each time)
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 2
+
+class Notification:
+    def __init__(self, category, kwargs, due):
+        self.category = category
+        self.kwargs = kwargs
+        self.due = due  # Not shown before this time, for retries
+        self.attempts = 0
+
+    @property
+    def key(self):
+        return (self.kwargs.get("title"), self.kwargs.get("message"))
+
+class NotificationService:
+    '''Shows desktop notifications from a queue on one worker thread, so callers never wait on the backend.
+
+    Notifications are grouped by category (the app name or title unless
+    given). While a category is rate limited, a newer notification replaces
+    the one waiting, so a burst shows once, with its latest content. A
+    repeat of the notification just shown is dropped, and a backend error
+    is retried a few times with backoff.
+    '''
+    def __init__(self, backend=None, clock=time.monotonic):
+        self.backend = backend
+        self.clock = clock
+        self.condition = threading.Condition()
+        self.pending = {}  # category -> Notification, oldest first
+        self.last_shown = {}  # category -> (time, key)
+        self.thread = None
+        self.stopping = False
+
+    def notify(self, category=None, **kwargs):
+        '''Queue a notification and return at once. kwargs are passed to plyer's notification.notify()'''
+        category = category or kwargs.get("app_name") or kwargs.get("title")
+        notification = Notification(category, kwargs, self.clock())
+        with self.condition:
+            shown_at, key = self.last_shown.get(category, (None, None))
+            if key == notification.key and notification.due - shown_at < DUPLICATE_WINDOW_SECONDS:
+                return
+            self.pending.pop(category, None)  # Re-insert, so the category keeps its place by newest arrival
+            self.pending[category] = notification
+            self.condition.notify()
+        self.start()
+
+    def start(self):
+        '''Start the worker thread if it is not already running'''
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping = False
+                self.thread = threading.Thread(target=self.run, name="notifications", daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=None):
+        '''Stop the worker thread, dropping notifications not yet shown'''
+        with self.condition:
+            self.stopping = True
+            self.pending.clear()
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def ready_at(self, notification):
+        '''Return the earliest time the notification may be shown'''
+        shown_at, _ = self.last_shown.get(notification.category, (None, None))
+        if shown_at is None:
+            return notification.due
+        interval = CATEGORY_INTERVALS.get(notification.category, MIN_INTERVAL_SECONDS)
+        return max(notification.due, shown_at + interval)
+
+    def next_notification(self):
+        '''Wait for a notification that may be shown now and return it, or None once stopping'''
+        with self.condition:
+            while not self.stopping:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                ready_at, notification = min(((self.ready_at(n), n) for n in self.pending.values()), key=lambda item: item[0])
+                delay = ready_at - self.clock()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                del self.pending[notification.category]
+                self.last_shown[notification.category] = (self.clock(), notification.key)
+                return notification
+            return None
+
+    def run(self):
+        while True:
+            notification = self.next_notification()
+            if notification is None:
+                return
+
+            try:
+                self.show(notification.kwargs)
+            except Exception:
+                self.retry(notification)
+
+    def show(self, kwargs):
+        backend = self.backend
+        if backend is None:
+            from plyer import notification  # Imported on the first notification, not at startup
+            backend = notification.notify
+        backend(**kwargs)
+
+    def retry(self, notification):
+        '''Queue a failed notification again after a backoff, unless it is out of attempts or superseded'''
+        notification.attempts += 1
+        if notification.attempts >= MAX_ATTEMPTS:
+            print(f"Error showing notification '{notification.key[0]}':")
+            traceback.print_exc()
+            return
+        with self.condition:
+            self.last_shown.pop(notification.category, None)  # It was never seen
+            if notification.category not in self.pending:
+                notification.due = self.clock() + RETRY_DELAY_SECONDS * 2 ** (notification.attempts - 1)
+                self.pending[notification.category] = notification
+
+_service = None
+
+def get_notification_service():
+    '''Return the shared notification service'''
+    global _service
+    if _service is None:
+        _service = NotificationService()
+    return _service
+
+def notify(category=None, **kwargs):
+    '''Show a desktop notification without blocking. See NotificationService.notify()'''
+    get_notification_service().notify(category, **kwargs)
+
+def stop_notifications():
+    '''Stop the shared notification service, if it was used'''
+    if _service is not None:
+        _service.stop(timeout=5)
@@ -1,62 +1,99 @@
+import math
+import sqlite3
 import tkinter as tk
+from datetime import date, timedelta
 from tkinter import ttk
-import os
 from tkinter import messagebox
-from datetime import datetime
-import sqlite3
-from plyer import notification # For notifications
-
-class PomodoroTimer:
-    def __init__(self, root):
-        self.root = root
+from .database import get_connection
+from .db_executor import QueryGroup, get_executor
+from .dispatch import get_dispatcher
+from .formatting import to_12_hour
+from .pomodoro_engine import LONG_BREAK, SHORT_BREAK, get_pomodoro_engine
+from .screens import Screen
+from .stores import PomodoroStore, TaskStore
+from .ticker import get_ticker
+from .write_queue import get_write_queue
+
+# Days and tags shown in the stats window
+STATS_DAYS = 7
+STATS_TAGS = 5
+
+class PomodoroTimer(Screen):
+    background = '#0385ff'
+    min_size = (1280, 720)
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
 
-        self.timer_running = False
         self.work_duration = 25  # Default work duration in minutes
         self.break_duration = 5  # Default break duration in minutes
-        self.remaining_time = None
-        self.is_work_interval = True
-        self.root['background'] = '#0385ff'
-        self.root.minsize(width=1280, height=720)
+        # The session lives in the engine, so it keeps running while this screen is hidden or destroyed
+        self.engine = get_pomodoro_engine(self.root)
+        self.ticker = get_ticker(self.root)
+        self.tick_token = None
+        self.shown = False
         self.conn = None
-        self.cursor = None
+        self.tasks = None
+        self.writes = get_write_queue()
+        self.ui = get_dispatcher(self.root)
+        self.queries = QueryGroup(get_executor(), self.ui)
+        self.stats_window = None
 
         # Initialize database
         self.open_db_conn()
         
         self.create_pomodoro_ui()
+        self.engine.listeners.append(self.on_engine_event)
 
     def open_db_conn(self):
-        '''Open and intitialize the database'''
+        '''Borrow the shared database connection. The schema is set up once per process'''
         if self.conn is None:
-          db_dir = os.path.join(os.getcwd(), "data")
-          self.conn = sqlite3.connect(f"{db_dir}/tasks.db")
-          self.cursor = self.conn.cursor()
+          self.conn = get_connection()
+          self.tasks = TaskStore(self.conn)
 
     def close_db_conn(self):
-        '''Close the connection to the SQLite database.'''
+        '''Release the shared connection. It stays open for the next screen'''
+        self.queries.cancel()
         if self.conn:
-            self.conn.close()
             self.conn = None
-            self.cursor = None
+            self.tasks = None
+
+    def on_show(self):
+        '''Reload the task list only if the data changed while the screen was hidden'''
+        super().on_show()
+        self.shown = True
+        self.show_session()
+        if self.data_changed():
+            self.load_tasks()
+
+    def on_hide(self):
+        # The engine keeps the session running; only the display stops ticking
+        self.shown = False
+        self.follow_ticks()
+        self.close_stats()
+        if self.queries.cancel():
+            self.forget_data_version()
+
+    def destroy(self):
+        self.engine.listeners.remove(self.on_engine_event)
+        super().destroy()
+        self.close_db_conn()
 
     def create_pomodoro_ui(self):
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#0385ff')
-
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
-
         # Split UI into left and right frames
-        self.left_frame = ttk.Frame(self.root, style='Custom.TFrame', padding=10)
+        self.left_frame = ttk.Frame(self.frame, style='Custom.TFrame', padding=10)
         self.left_frame.pack(side="left", fill="y", padx=10, pady=10)
 
-        self.right_frame = ttk.Frame(self.root, style='Custom.TFrame', padding=10)
+        self.right_frame = ttk.Frame(self.frame, style='Custom.TFrame', padding=10)
         self.right_frame.pack(side="right", anchor="center", expand=True, fill="both", padx=10, pady=10)
 
         # Left Frame: Pomodoro Timer
         self.timer_label = ttk.Label(self.left_frame, background='#0385ff', text="25:00", font=("Arial", 40))
         self.timer_label.pack(pady=20)
 
+        self.phase_label = ttk.Label(self.left_frame, background='#0385ff', text="", font=("Arial", 18))
+        self.phase_label.pack(pady=5)
+
         ttk.Label(self.left_frame, background='#0385ff', text="Work Duration (minutes):", font=("Arial", 18)).pack(anchor="w", pady=5)
         self.work_spinbox = ttk.Spinbox(self.left_frame, from_=1, to=60, width=5, validate="key")
         self.work_spinbox.set(self.work_duration)
@@ -70,12 +107,18 @@ class PomodoroTimer:
         self.start_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Start", command=self.start_pomodoro)
         self.start_button.pack(pady=10)
 
+        self.pause_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Pause", command=self.toggle_pause, state="disabled")
+        self.pause_button.pack(pady=10)
+
         self.end_button = ttk.Button(self.left_frame, style='Custom.TButton', text="End Session", command=self.end_pomodoro)
         self.end_button.pack(pady=10)
 
         self.reset_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Reset Timer", command=self.reset_pomodoro)
         self.reset_button.pack(pady=10)
 
+        self.stats_button = ttk.Button(self.left_frame, style='Custom.TButton', text="View Stats", command=self.open_stats)
+        self.stats_button.pack(pady=10)
+
         # Right Frame: Task List
         self.task_list_label = ttk.Label(self.right_frame, background='#0385ff', text="Tasks", font=("Arial", 22))
         self.task_list_label.pack(pady=10)
@@ -87,6 +130,7 @@ class PomodoroTimer:
         self.task_list.heading("Time", text="Time")
         self.task_list.heading("Tag", text="Tag")
         self.task_list.pack(expand=True, fill="both")
+        self.task_list.bind("<<TreeviewSelect>>", self.on_task_select)
 
         button_frame = ttk.Frame(self.right_frame, style='Custom.TFrame', padding=10)
         button_frame.pack(anchor="center", expand=True, fill='none')
@@ -101,10 +145,8 @@ class PomodoroTimer:
         self.view_description_button = ttk.Button(button_frame, style='Custom.TButton', text="View Description", command=self.show_task_description)
         self.view_description_button.pack(pady=10)
 
-        self.load_tasks()
-
     def start_pomodoro(self):
-        if self.timer_running:
+        if self.engine.active:
             return
 
         try:
@@ -114,48 +156,52 @@ class PomodoroTimer:
             messagebox.showerror("Invalid Input", "Please enter valid durations for work and break intervals.")
             return
 
-        self.is_work_interval = True
-        self.remaining_time = self.work_duration * 60
-        self.update_timer()
-
-    def update_timer(self):
-        if self.remaining_time is not None and self.timer_label.winfo_exists():
-            minutes, seconds = divmod(self.remaining_time, 60)
-            self.timer_label.config(text=f"{minutes:02}:{seconds:02}")
+        self.engine.set_minutes(self.work_duration, self.break_duration)
+        self.engine.start()
 
-            if self.remaining_time > 0:
-                self.timer_running = True
-                self.remaining_time -= 1
-                self.root.after(1000, self.update_timer)
-            else:
-                self.timer_running = False
-                self.handle_interval_end()
-
-    def handle_interval_end(self):
-        if self.is_work_interval:
-            notification.notify(
-              title="Pomodoro Timer",
-              message="Work interval complete! Time for a break.",
-              app_name="Pomodoro Timer",
-              timeout=5
-            )
-            self.remaining_time = self.break_duration * 60
+    def toggle_pause(self):
+        if self.engine.paused:
+            self.engine.resume()
         else:
-            notification.notify(
-              title="Pomodoro Timer",
-              message="Break interval complete! Back to work.",
-              app_name="Pomodoro Timer",
-              timeout=5
-            )            
-            self.remaining_time = self.work_duration * 60
-
-        self.is_work_interval = not self.is_work_interval
-        self.update_timer()
+            self.engine.pause()
+
+    def on_engine_event(self, event, phase):
+        if self.shown:
+            self.show_session()
+
+    def show_session(self):
+        '''Show the engine's phase and buttons, and tick the countdown while it runs'''
+        if not self.engine.active:
+            self.timer_label.config(text=f"{self.work_duration:02}:00")
+            self.phase_label.config(text="")
+            self.pause_button.config(text="Pause", state="disabled")
+        else:
+            if self.engine.phase == LONG_BREAK:
+                phase = "Long break"
+            elif self.engine.phase == SHORT_BREAK:
+                phase = "Break"
+            else:
+                phase = f"Work session {self.engine.completed + 1}"
+            self.phase_label.config(text=f"{phase} (paused)" if self.engine.paused else phase)
+            self.pause_button.config(text="Resume" if self.engine.paused else "Pause", state="normal")
+            self.show_remaining()
+        self.follow_ticks()
+
+    def follow_ticks(self):
+        '''Subscribe to the ticker only while the countdown is visible and moving'''
+        if self.shown and self.engine.running:
+            if self.tick_token is None:
+                self.tick_token = self.ticker.subscribe(self.show_remaining)
+        elif self.tick_token is not None:
+            self.ticker.unsubscribe(self.tick_token)
+            self.tick_token = None
+
+    def show_remaining(self):
+        minutes, seconds = divmod(math.ceil(self.engine.remaining()), 60)
+        self.timer_label.config(text=f"{minutes:02}:{seconds:02}")
 
     def reset_pomodoro(self):
-        self.timer_running = False
-        self.remaining_time = None
-        self.is_work_interval = False
+        self.engine.stop()
         self.work_duration = 25
         self.break_duration = 5
         self.work_spinbox.set(self.work_duration)
@@ -163,28 +209,107 @@ class PomodoroTimer:
         self.timer_label.config(text="25:00")
 
     def end_pomodoro(self):
-        self.timer_running = False
-        self.timer_label.config(text="25:00")
-        self.close_db_conn()
+        self.engine.stop()
         self.return_to_home()
 
     def load_tasks(self):
+        '''Fetch overdue and upcoming tasks in the background'''
+        self.task_list_label.config(text="Tasks (loading...)")
+        self.queries.run("tasks", lambda conn: TaskStore(conn).active(), self.show_tasks, self.on_tasks_failed)
+
+    def on_tasks_failed(self, error):
+        self.task_list_label.config(text="Tasks")
+        messagebox.showerror("Error", f"Failed to load tasks: {error}")
+
+    def show_tasks(self, tasks):
         # Clear current list
+        self.task_list_label.config(text="Tasks")
         for row in self.task_list.get_children():
             self.task_list.delete(row)
 
-        # Fetch overdue and upcoming tasks
-        self.cursor.execute('''
-            SELECT tasks.id, tasks.title, tasks.due_date, tasks.due_time, tags.name, tasks.status
-            FROM tasks
-            LEFT JOIN tags ON tasks.tag_id = tags.id
-            WHERE tasks.status IN ('overdue', 'upcoming')
-        ''')
-        tasks = self.cursor.fetchall()
-
         for task in tasks:
-            task_time = self.convert_time_to_ampm(task[3]) if task[3] else "All-Day"
-            self.task_list.insert("", "end", iid=task[0], values=(task[1], task[5], task[2], task_time, task[4]))
+            task_time = self.convert_time_to_ampm(task.due_time) if task.due_time else "All-Day"
+            self.task_list.insert("", "end", iid=task.id, values=(task.title, task.status, task.due_date, task_time, task.tag))
+
+        # Keep showing which task the session's work is recorded against
+        if self.engine.task_id is not None and self.task_list.exists(self.engine.task_id):
+            self.task_list.selection_set(self.engine.task_id)
+
+    def on_task_select(self, event):
+        '''Record the session's work intervals against the selected task'''
+        selected_item = self.task_list.selection()
+        self.engine.task_id = int(selected_item[0]) if selected_item else None
+
+    def open_stats(self):
+        '''Show focus time per day, this week and per tag, read from the rollup tables'''
+        # There is only ever one stats window. Opening it again brings it forward with fresh numbers.
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            self.load_stats()
+            return
+
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Pomodoro Stats")
+        self.stats_window.geometry("500x500")
+
+        self.stats_label = ttk.Label(self.stats_window, text="Loading...", font=("Arial", 14))
+        self.stats_label.pack(pady=10)
+
+        self.days_tree = ttk.Treeview(self.stats_window, columns=("Day", "Sessions", "Minutes"), show="headings", height=STATS_DAYS)
+        for column in ("Day", "Sessions", "Minutes"):
+            self.days_tree.heading(column, text=column)
+        self.days_tree.pack(fill="x", padx=10, pady=5)
+
+        self.tags_tree = ttk.Treeview(self.stats_window, columns=("Tag", "Sessions", "Minutes"), show="headings", height=STATS_TAGS)
+        for column in ("Tag", "Sessions", "Minutes"):
+            self.tags_tree.heading(column, text=column)
+        self.tags_tree.pack(fill="x", padx=10, pady=5)
+        self.load_stats()
+
+    def load_stats(self):
+        '''Read the stats for the open stats window in the background'''
+        self.stats_label.config(text="Loading...")
+        for tree in (self.days_tree, self.tags_tree):
+            tree.delete(*tree.get_children())
+
+        today = date.today()
+        first_day = today - timedelta(days=STATS_DAYS - 1)
+        monday = today - timedelta(days=today.weekday())
+
+        def read_stats(conn):
+            store = PomodoroStore(conn)
+            return store.days(first_day.isoformat(), today.isoformat()), store.week(monday.isoformat()), store.top_tags(STATS_TAGS)
+
+        self.queries.run("stats", read_stats, self.show_stats, self.on_stats_failed)
+
+    def close_stats(self):
+        '''Close the stats window, if open, and drop its query'''
+        self.queries.cancel("stats")
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.destroy()
+        self.stats_window = None
+
+    def on_stats_failed(self, error):
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+        self.stats_label.config(text="Stats unavailable")
+        messagebox.showerror("Error", f"Failed to load pomodoro stats: {error}")
+
+    def show_stats(self, stats):
+        days, week, tags = stats
+        if self.stats_window is None or not self.stats_window.winfo_exists():
+            return
+
+        today = days[-1] if days and days[-1].period == date.today().isoformat() else None
+        today_sessions = today.work_sessions if today else 0
+        week_sessions = week.work_sessions if week else 0
+        week_minutes = week.work_seconds // 60 if week else 0
+        self.stats_label.config(text=f"Today: {today_sessions} sessions    This week: {week_sessions} sessions, {week_minutes} min")
+
+        for day in reversed(days):
+            self.days_tree.insert("", "end", values=(day.period, day.work_sessions, day.work_seconds // 60))
+        for tag in tags:
+            self.tags_tree.insert("", "end", values=(tag.tag, tag.work_sessions, tag.work_seconds // 60))
 
     def show_task_description(self):
         selected_item = self.task_list.selection()
@@ -193,8 +318,7 @@ class PomodoroTimer:
             return
 
         task_id = selected_item[0]
-        self.cursor.execute("SELECT description FROM tasks WHERE id = ?", (task_id,))
-        description = self.cursor.fetchone()[0]
+        description = self.tasks.description(task_id)
         messagebox.showinfo("Task Description", description)
 
 
@@ -205,23 +329,24 @@ class PomodoroTimer:
             return
 
         task_id = selected_item[0]
-        self.cursor.execute("UPDATE tasks SET status = 'completed' WHERE id = ?", (task_id,))
-        self.conn.commit()
-        self.load_tasks()
+        future = self.writes.submit(lambda conn: TaskStore(conn).mark_complete(task_id))
+        self.ui.when_done(future, self.on_task_completed)
 
-    def convert_time_to_ampm(self, time_str):
+    def on_task_completed(self, future):
+        '''Reload the task list once the change is committed, or after it failed and was rolled back'''
         try:
-            return datetime.strptime(time_str, "%H:%M").strftime("%I:%M %p")
-        except ValueError:
-            return time_str
+            future.result()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to mark task complete: {e}")
+        if self.conn is not None:
+            self.load_tasks()
+
+    def convert_time_to_ampm(self, time_str):
+        return to_12_hour(time_str, default=time_str)
 
     def open_task_form(self):
-        from components import task_manager
-        self.close_db_conn()
-        task_manager.TaskManager(self.root)
+        self.app.show("tasks")
 
     def return_to_home(self):
         '''Return to the home screen'''
-        from main import SmartClockApp
-        self.close_db_conn()
-        SmartClockApp(self.root) 
+        self.app.show("home")
@@ -0,0 +1,199 @@
+import functools
+import math
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from .notifications import notify
+from .stores import PomodoroStore
+from .ticker import Countdown
+from .write_queue import get_write_queue
+
+WORK = "work"
+SHORT_BREAK = "short break"
+LONG_BREAK = "long break"
+DEFAULT_MINUTES = {WORK: 25, SHORT_BREAK: 5, LONG_BREAK: 15}
+LONG_BREAK_EVERY = 4  # Work sessions per long break
+
+# A completed phase. start and end are clock times; seconds is the phase's length, not counting pauses.
+Interval = namedtuple("Interval", "phase start end seconds")
+
+class PomodoroEngine:
+    '''Pomodoro session state with no UI: the current phase, its deadline and the work sessions done.
+
+    Deadlines are on a monotonic clock, injectable for tests. The engine
+    never schedules itself: advance() finishes whatever phases have run out,
+    and is called at each deadline by TkPomodoroDriver (or by a test after
+    moving its fake clock). Each phase starts at the previous one's
+    deadline, so a late advance() doesn't shift the rest of the session.
+
+    Listeners are called as listener(event, phase) for "start", "pause",
+    "resume" and "stop", and for "finish" with the phase that just ended,
+    which is described by self.finished.
+    '''
+    def __init__(self, clock=time.monotonic, minutes=None, long_break_every=LONG_BREAK_EVERY):
+        self.clock = clock
+        self.minutes = dict(DEFAULT_MINUTES, **(minutes or {}))
+        self.long_break_every = long_break_every
+        self.phase = None
+        self.phase_start = None
+        self.phase_seconds = 0
+        self.countdown = None
+        self.completed = 0  # Work sessions finished since start()
+        self.finished = None  # Interval of the phase that ended last
+        self.task_id = None  # Task the work sessions are for, if any
+        self.listeners = []
+
+    @property
+    def active(self):
+        '''True from start() until stop(), paused or not'''
+        return self.countdown is not None
+
+    @property
+    def running(self):
+        return self.active and not self.countdown.paused
+
+    @property
+    def paused(self):
+        return self.active and self.countdown.paused
+
+    def set_minutes(self, work, short_break, long_break=None):
+        '''Change the phase lengths. A phase already under way keeps its length'''
+        self.minutes[WORK] = work
+        self.minutes[SHORT_BREAK] = short_break
+        if long_break is not None:
+            self.minutes[LONG_BREAK] = long_break
+
+    def remaining(self):
+        '''Seconds left in the current phase'''
+        return self.countdown.remaining() if self.active else 0.0
+
+    def deadline(self):
+        '''Clock time the current phase ends, or None when stopped or paused'''
+        return self.countdown.deadline if self.running else None
+
+    def start(self):
+        '''Start a new session with a work phase'''
+        self.completed = 0
+        self.begin(WORK, self.clock())
+        self.emit("start", WORK)
+
+    def pause(self):
+        if self.running:
+            self.countdown.pause()
+            self.emit("pause", self.phase)
+
+    def resume(self):
+        if self.paused:
+            self.countdown.resume()
+            self.emit("resume", self.phase)
+
+    def stop(self):
+        '''End the session'''
+        if self.active:
+            phase = self.phase
+            self.phase = None
+            self.countdown = None
+            self.emit("stop", phase)
+
+    def advance(self):
+        '''Finish every phase whose deadline has passed, and return how many finished'''
+        finished = 0
+        while self.running and self.countdown.finished():
+            ended, deadline = self.phase, self.countdown.deadline
+            self.finished = Interval(ended, self.phase_start, deadline, self.phase_seconds)
+            self.begin(self.next_phase(), deadline)
+            finished += 1
+            self.emit("finish", ended)
+        return finished
+
+    def begin(self, phase, start):
+        self.phase = phase
+        self.phase_start = start
+        self.phase_seconds = self.minutes[phase] * 60
+        self.countdown = Countdown(self.phase_seconds, self.clock, start=start)
+
+    def next_phase(self):
+        if self.phase != WORK:
+            return WORK
+        self.completed += 1
+        return LONG_BREAK if self.completed % self.long_break_every == 0 else SHORT_BREAK
+
+    def emit(self, event, phase):
+        for listener in list(self.listeners):
+            listener(event, phase)
+
+class TkPomodoroDriver:
+    '''Calls engine.advance() from the Tk main loop at each deadline, whichever screen is showing'''
+    def __init__(self, root, engine):
+        self.root = root
+        self.engine = engine
+        self.alarm_id = None
+        engine.listeners.append(self.on_event)
+
+    def on_event(self, event, phase):
+        self.arm()
+
+    def arm(self):
+        '''Schedule one callback at the engine's next deadline, replacing any earlier one'''
+        if self.alarm_id is not None:
+            self.root.after_cancel(self.alarm_id)
+            self.alarm_id = None
+        deadline = self.engine.deadline()
+        if deadline is not None:
+            delay_ms = max(0, math.ceil((deadline - self.engine.clock()) * 1000))
+            self.alarm_id = self.root.after(delay_ms, self.fire)
+
+    def fire(self):
+        self.alarm_id = None
+        if not self.engine.advance():
+            self.arm()  # Tk's timer ran slightly ahead of the monotonic clock
+
+def announce(engine, event, phase):
+    '''Notify the user when a phase ends'''
+    if event != "finish":
+        return
+    if phase == WORK and engine.phase == LONG_BREAK:
+        message = f"{engine.long_break_every} work intervals complete! Time for a long break."
+    elif phase == WORK:
+        message = "Work interval complete! Time for a break."
+    else:
+        message = "Break interval complete! Back to work."
+    notify(
+      title="Pomodoro Timer",
+      message=message,
+      app_name="Pomodoro Timer",
+      timeout=5
+    )
+
+def record(engine, event, phase):
+    '''Save each completed interval to the session history, linking work intervals to the engine's task'''
+    if event != "finish":
+        return
+    interval = engine.finished
+    now, clock_now = datetime.now(), engine.clock()
+    # Clock times are monotonic, so date them by how long ago they were
+    started_at = (now - timedelta(seconds=clock_now - interval.start)).isoformat(sep=" ", timespec="seconds")
+    ended_at = (now - timedelta(seconds=clock_now - interval.end)).isoformat(sep=" ", timespec="seconds")
+    task_id = engine.task_id if interval.phase == WORK else None
+    future = get_write_queue().submit(lambda conn: PomodoroStore(conn).record(interval.phase, started_at, ended_at, interval.seconds, task_id))
+    future.add_done_callback(report_record_error)
+
+def report_record_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error saving pomodoro session: {future.exception()}")
+
+_engine = None
+_driver = None
+
+def get_pomodoro_engine(root):
+    '''Return the app's pomodoro engine, driven by the main loop of root. It outlives the pomodoro screen'''
+    global _engine, _driver
+    if _engine is None:
+        _engine = PomodoroEngine()
+        _engine.listeners.append(functools.partial(announce, _engine))
+        _engine.listeners.append(functools.partial(record, _engine))
+    if _driver is None or _driver.root is not root:
+        if _driver is not None:
+            _engine.listeners.remove(_driver.on_event)
+        _driver = TkPomodoroDriver(root, _engine)
+    return _engine
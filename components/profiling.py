@@ -0,0 +1,101 @@
+'''Optional tracing of startup and screen builds.
+
+Run with --profile or set CLOCK_PROFILE=1 to record how long app startup,
+each screen switch, screen construction (imports, open_db_conn, create_*,
+load_*) and each background query take. The spans are written at exit to
+data/profile_trace.json in the Chrome trace event format, which
+chrome://tracing, Perfetto and speedscope show as a flame graph. When
+profiling is off, span() returns a shared do-nothing context manager and
+traced() returns the function unchanged, so the hooks cost nothing.
+'''
+import contextlib
+import fnmatch
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("CLOCK_PROFILE", "") not in ("", "0") or "--profile" in sys.argv
+TRACE_PATH = os.path.join("data", "profile_trace.json")
+
+# Screen methods that are traced, as fnmatch patterns
+TRACED_METHODS = ["__init__", "open_db_conn", "create_*", "load_*", "on_show"]
+
+_NULL_SPAN = contextlib.nullcontext()
+
+class Tracer:
+    '''Collects complete ("X") trace events from any thread'''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.start = time.perf_counter()
+
+    def now_us(self):
+        return (time.perf_counter() - self.start) * 1e6
+
+    def add(self, name, category, start_us, args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start_us,
+            "dur": self.now_us() - start_us,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def span(self, name, category, args=None):
+        start_us = self.now_us()
+        try:
+            yield
+        finally:
+            self.add(name, category, start_us, args)
+
+    def trace(self):
+        '''Return the events, with thread names, as a trace file object'''
+        with self.lock:
+            events = list(self.events)
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread.ident, "args": {"name": thread.name}}
+                 for thread in threading.enumerate()]
+        return {"traceEvents": names + events, "displayTimeUnit": "ms"}
+
+tracer = Tracer()
+
+def span(name, category="app", **args):
+    '''Time a with-block as a trace span'''
+    if not ENABLED:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+def traced(func, name=None, category="app"):
+    '''Wrap func so each call is a trace span. Returns func itself when profiling is off'''
+    if not ENABLED:
+        return func
+    name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name, category):
+            return func(*args, **kwargs)
+    return wrapper
+
+def trace_methods(cls, patterns=TRACED_METHODS, category="screen"):
+    '''Trace the methods cls defines whose names match patterns'''
+    if not ENABLED:
+        return
+    for attr, value in list(vars(cls).items()):
+        if callable(value) and any(fnmatch.fnmatchcase(attr, pattern) for pattern in patterns):
+            setattr(cls, attr, traced(value, category=category))
+
+def write_trace(path=TRACE_PATH):
+    '''Save the trace when profiling is on'''
+    if ENABLED:
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump(tracer.trace(), trace_file)
@@ -0,0 +1,208 @@
+'''Optional instrumentation for the app's SQLite statements.
+
+Set CLOCK_QUERY_STATS=1 to open every connection with InstrumentedConnection.
+It records a latency histogram, row counts and call sites per statement, and
+appends statements slower than CLOCK_SLOW_QUERY_MS (default 50) to
+data/slow_queries.log. When the variable is unset connections are plain
+sqlite3 connections, so the instrumentation costs nothing.
+'''
+import os
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+
+ENABLED = os.environ.get("CLOCK_QUERY_STATS", "") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("CLOCK_SLOW_QUERY_MS", "50"))
+SLOW_QUERY_LOG = os.path.join("data", "slow_queries.log")
+REPORT_PATH = os.path.join("data", "query_stats.txt")
+
+# Upper bounds of the latency histogram buckets, in milliseconds. The last bucket is open ended.
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+# Frames in these files are plumbing, not call sites
+_SKIPPED_FILES = (__file__, "stores.py", "contextlib.py", "name_cache.py", "db_executor.py", "write_queue.py", "thread.py")
+
+class StatementStats:
+    '''Totals for one normalized SQL statement'''
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+        self.call_sites = Counter()
+        self.last_params = ()
+
+    def percentile(self, fraction):
+        '''Upper bound in ms of the bucket holding the given fraction of calls'''
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= fraction * self.calls:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else float("inf")
+        return 0.0
+
+class QueryStats:
+    '''Thread-safe statement statistics plus the slow-query log'''
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log=SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.statements = {}
+        self.lock = threading.Lock()
+
+    def record(self, sql, params, elapsed_ms, rows=0):
+        sql = " ".join(sql.split())
+        call_site = find_call_site()
+        with self.lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                stats = self.statements[sql] = StatementStats(sql)
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows += rows
+            stats.histogram[bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+            stats.call_sites[call_site] += 1
+            stats.last_params = params
+        if elapsed_ms >= self.slow_ms:
+            self.log_slow(sql, params, elapsed_ms, call_site)
+
+    def add_rows(self, sql, rows):
+        '''Count rows fetched after the statement was timed'''
+        if sql is None:
+            return
+        with self.lock:
+            stats = self.statements.get(" ".join(sql.split()))
+            if stats is not None:
+                stats.rows += rows
+
+    def log_slow(self, sql, params, elapsed_ms, call_site):
+        line = f"{datetime.now().isoformat(timespec='milliseconds')} {elapsed_ms:.1f} ms at {call_site}: {sql} {params!r}\n"
+        try:
+            with self.lock, open(self.slow_log, "a", encoding="utf-8") as log:
+                log.write(line)
+        except OSError as e:
+            print(f"Error writing slow query log: {e}")
+
+    def report(self, conn=None, top=20):
+        '''Return a text summary of the slowest statements by total time.
+
+        Given a connection, the EXPLAIN QUERY PLAN of each statement is included.
+        '''
+        with self.lock:
+            statements = sorted(self.statements.values(), key=lambda stats: stats.total_ms, reverse=True)[:top]
+
+        lines = []
+        for stats in statements:
+            lines.append(
+                f"{stats.total_ms:9.1f} ms total  {stats.calls:6} calls  {stats.total_ms / stats.calls:7.2f} ms avg  "
+                f"p95 <= {stats.percentile(0.95)} ms  max {stats.max_ms:.1f} ms  {stats.rows} rows"
+            )
+            lines.append(f"    {stats.sql}")
+            for call_site, count in stats.call_sites.most_common(3):
+                lines.append(f"    {count:6} x {call_site}")
+            if conn is not None:
+                for row in explain(conn, stats.sql, stats.last_params):
+                    lines.append(f"    plan: {row}")
+        return "\n".join(lines)
+
+def explain(conn, sql, params=()):
+    '''Return the EXPLAIN QUERY PLAN rows for a statement, or an empty list if it has no plan'''
+    try:
+        return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    except sqlite3.Error:
+        # BEGIN, COMMIT, PRAGMA and DDL statements can't be explained
+        return []
+
+def find_call_site():
+    '''Return "file:line function" of the nearest caller outside the database plumbing'''
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(_SKIPPED_FILES):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+class InstrumentedCursor(sqlite3.Cursor):
+    '''A cursor that times each statement and counts the rows it returns'''
+    def __init__(self, connection):
+        super().__init__(connection)
+        self.sql = None  # Unset until execute(), so fetches before it behave like sqlite3's
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            self.sql = sql
+            stats.record(sql, params, (time.perf_counter() - start) * 1000, max(self.rowcount, 0))
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            self.sql = sql
+            stats.record(sql, (), (time.perf_counter() - start) * 1000, max(self.rowcount, 0))
+
+    def executescript(self, sql_script):
+        self.sql = None  # A script has no single statement to count rows against
+        return super().executescript(sql_script)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            stats.add_rows(self.sql, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        stats.add_rows(self.sql, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        stats.add_rows(self.sql, len(rows))
+        return rows
+
+    def __next__(self):
+        row = super().__next__()
+        stats.add_rows(self.sql, 1)
+        return row
+
+class InstrumentedConnection(sqlite3.Connection):
+    '''A connection whose cursors, including the ones behind execute(), are instrumented'''
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            stats.record("COMMIT", (), (time.perf_counter() - start) * 1000)
+
+stats = QueryStats()
+
+def connection_factory():
+    '''Return the connection class to open connections with'''
+    return InstrumentedConnection if ENABLED else sqlite3.Connection
+
+def write_report(conn=None, path=REPORT_PATH):
+    '''Save the statement summary when instrumentation is on'''
+    if ENABLED:
+        with open(path, "w", encoding="utf-8") as report:
+            report.write(stats.report(conn) + "\n")
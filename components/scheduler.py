@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+import traceback
+
+# The worker never sleeps longer than this, so after a system suspend (when timed
+# waits stall) overdue jobs are noticed within this many seconds of resuming
+MAX_WAIT_SECONDS = 30
+
+class Job:
+    '''A call scheduled on a Scheduler. Keep it to cancel the call later'''
+    def __init__(self, scheduler, func, args, due, interval=None, jitter=0.0, name=None):
+        self.scheduler = scheduler
+        self.func = func
+        self.args = args
+        self.base = due  # Grid point of the next run, before jitter
+        self.due = due
+        self.interval = interval
+        self.jitter = jitter
+        self.name = name or getattr(func, "__name__", "job")
+        self.cancelled = False
+
+    def cancel(self):
+        '''Stop the job from running again'''
+        self.scheduler.cancel(self)
+
+class Scheduler:
+    '''Runs one-shot and recurring jobs from a priority queue on a single worker thread.
+
+    Due times are wall-clock times, so jobs missed while the machine was
+    suspended still come due on resume. A recurring job that missed several
+    runs runs once to catch up, then continues on its original grid. Jobs
+    should be short; anything slow belongs on its own worker.
+    '''
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.heap = []  # (due, sequence, job)
+        self.sequence = itertools.count()  # Breaks ties between jobs due at the same time
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopping = False
+
+    def call_later(self, delay, func, *args, name=None):
+        '''Run func(*args) once, delay seconds from now'''
+        return self.schedule(Job(self, func, args, self.clock() + delay, name=name))
+
+    def call_every(self, interval, func, *args, first_delay=None, jitter=0.0, name=None):
+        '''Run func(*args) every interval seconds, each run delayed by up to jitter seconds.
+
+        The first run is after first_delay seconds, or after one interval.
+        '''
+        first_due = self.clock() + (interval if first_delay is None else first_delay)
+        job = Job(self, func, args, first_due, interval=interval, jitter=jitter, name=name)
+        job.due = job.base + random.uniform(0, jitter)
+        return self.schedule(job)
+
+    def schedule(self, job):
+        with self.condition:
+            heapq.heappush(self.heap, (job.due, next(self.sequence), job))
+            self.condition.notify()
+        self.start()
+        return job
+
+    def cancel(self, job):
+        '''Cancel a job. Cancelled entries are dropped when they reach the front of the queue'''
+        with self.condition:
+            job.cancelled = True
+
+    def start(self):
+        '''Start the worker thread if it is not already running'''
+        with self.condition:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping = False
+                self.thread = threading.Thread(target=self.run, name="scheduler", daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=None):
+        '''Stop the worker thread. Pending jobs stay queued for a later start()'''
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def next_job(self):
+        '''Wait for the next due job and return it, or None once stopping'''
+        with self.condition:
+            while not self.stopping:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                due, _, job = self.heap[0]
+                if job.cancelled:
+                    heapq.heappop(self.heap)
+                    continue
+                delay = due - self.clock()
+                if delay > 0:
+                    self.condition.wait(min(delay, MAX_WAIT_SECONDS))
+                    continue
+                heapq.heappop(self.heap)
+                return job
+            return None
+
+    def run(self):
+        while True:
+            job = self.next_job()
+            if job is None:
+                return
+
+            try:
+                job.func(*job.args)
+            except Exception:
+                # A failing job must not take the other jobs down with it
+                print(f"Error in scheduled job '{job.name}':")
+                traceback.print_exc()
+
+            if job.interval is not None:
+                self.reschedule(job)
+
+    def reschedule(self, job):
+        '''Queue a recurring job's next run, skipping runs that were missed'''
+        now = self.clock()
+        job.base += job.interval
+        if job.base <= now:
+            missed = int((now - job.base) // job.interval) + 1
+            job.base += missed * job.interval
+        job.due = job.base + random.uniform(0, job.jitter)
+        with self.condition:
+            if not job.cancelled:
+                heapq.heappush(self.heap, (job.due, next(self.sequence), job))
+
+_scheduler = None
+
+def get_scheduler():
+    '''Return the shared scheduler'''
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,174 @@
+import importlib
+import threading
+from collections import OrderedDict
+from tkinter import ttk
+from .database import get_connection
+from .profiling import span, trace_methods
+
+MAX_CACHED_SCREENS = 4  # Not counting pinned screens like home
+
+class Screen:
+    '''Base class for a screen that is built once and then shown and hidden.
+
+    Subclasses build their widgets inside self.frame in __init__, describe
+    their look with the class attributes below, and load their data in
+    on_show(), which runs on every visit.
+    '''
+    background = '#5cffa5'
+    min_size = (1280, 720)
+    button_background = '#ffef0a'
+    button_width = 15
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        trace_methods(cls)  # Only does anything in profiling mode
+
+    def __init__(self, frame, app):
+        self.frame = frame
+        self.app = app
+        self.root = frame.winfo_toplevel()
+        self.seen_data_version = None
+        self.commands = {}  # Callable -> name of its Tcl command, e.g. for validatecommand
+
+    def apply_style(self):
+        '''Give the window and the shared ttk styles this screen's look'''
+        self.root['background'] = self.background
+        self.root.minsize(width=self.min_size[0], height=self.min_size[1])
+        ttk.Style().configure('Custom.TFrame', background=self.background)
+        ttk.Style().configure('Custom.TButton', background=self.button_background, relief='solid', font=('Arial', 18), width=self.button_width)
+
+    def data_changed(self):
+        '''Return True on the first call, then whenever another connection has committed since the last call'''
+        version = get_connection().execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self.seen_data_version
+        self.seen_data_version = version
+        return changed
+
+    def forget_data_version(self):
+        '''Make the next data_changed() return True, e.g. after a load was cancelled before it was shown'''
+        self.seen_data_version = None
+
+    def register_command(self, func):
+        '''Return a Tcl command name that calls func, registering it once for the life of the screen.
+
+        Use this rather than root.register(), which creates a new command on
+        every call and keeps it until the app exits.
+        '''
+        name = self.commands.get(func)
+        if name is None:
+            name = self.commands[func] = self.root.register(func)
+        return name
+
+    def on_show(self):
+        '''Called each time the screen is raised'''
+        self.apply_style()
+
+    def on_hide(self):
+        '''Called each time another screen replaces this one'''
+
+    def destroy(self):
+        '''Tear the screen down for good'''
+        self.on_hide()
+        self.frame.destroy()
+        for name in self.commands.values():
+            self.root.deletecommand(name)
+        self.commands.clear()
+
+class ScreenManager:
+    '''Builds each screen on its first visit and keeps it alive, hidden, afterwards.
+
+    Switching screens only swaps which frame is packed. The least recently
+    shown screens beyond max_cached are destroyed to bound memory, and are
+    rebuilt if they are visited again.
+    '''
+    def __init__(self, root, app, max_cached=MAX_CACHED_SCREENS):
+        self.root = root
+        self.app = app
+        self.max_cached = max_cached
+        self.screen_types = {}
+        self.pinned = set()
+        self.screens = OrderedDict()  # Least recently shown first
+        self.current = None
+
+    def register(self, name, screen_type, pinned=False):
+        '''Make a screen available under name. Pinned screens are never evicted.
+
+        screen_type is a Screen subclass, or a "package.module:Class" path that
+        is imported the first time the screen is shown.
+        '''
+        self.screen_types[name] = screen_type
+        if pinned:
+            self.pinned.add(name)
+
+    def screen_type(self, name):
+        '''Return the Screen subclass for name, importing its module if needed'''
+        screen_type = self.screen_types[name]
+        if isinstance(screen_type, str):
+            module_name, class_name = screen_type.split(":")
+            with span(f"import {module_name}", "import"):
+                module = importlib.import_module(module_name)
+            screen_type = self.screen_types[name] = getattr(module, class_name)
+        return screen_type
+
+    def prewarm(self, names):
+        '''Import the modules of the given screens on a background thread, so their first visit is quick'''
+        modules = [self.screen_types[name].split(":")[0] for name in names if isinstance(self.screen_types[name], str)]
+
+        def run():
+            for module_name in modules:
+                try:
+                    with span(f"import {module_name}", "import"):
+                        importlib.import_module(module_name)
+                except Exception as e:
+                    # The screen will report the problem when it is opened
+                    print(f"Error preloading {module_name}: {e}")
+
+        threading.Thread(target=run, name="prewarm", daemon=True).start()
+
+    def show(self, name):
+        '''Raise the named screen, building it if needed, and return it'''
+        with span(f"show {name}", "navigation"):
+            return self.switch_to(name)
+
+    def switch_to(self, name):
+        if name == self.current:
+            return self.screens[name]
+
+        # Build before hiding the current screen, so a screen that fails to build leaves it in place
+        screen = self.screens.get(name)
+        if screen is None:
+            frame = ttk.Frame(self.root, style='Custom.TFrame')
+            try:
+                screen_type = self.screen_type(name)
+                with span(f"build {name}", "screen"):
+                    screen = screen_type(frame, self.app)
+            except Exception:
+                frame.destroy()
+                raise
+            self.screens[name] = screen
+
+        if self.current is not None:
+            previous = self.screens[self.current]
+            previous.on_hide()
+            previous.frame.pack_forget()
+
+        self.screens.move_to_end(name)
+        self.current = name
+
+        screen.on_show()
+        screen.frame.pack(fill='both', expand=True)
+        self.evict()
+        return screen
+
+    def evict(self):
+        '''Destroy the least recently shown screens over the cache limit'''
+        evictable = [name for name in self.screens if name not in self.pinned and name != self.current]
+        cached = len([name for name in self.screens if name not in self.pinned])
+        for name in evictable[:max(0, cached - self.max_cached)]:
+            self.screens.pop(name).destroy()
+
+    def close(self):
+        '''Destroy every screen, including pinned ones'''
+        while self.screens:
+            self.screens.popitem()[1].destroy()
+        self.current = None
@@ -1,30 +1,37 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-from plyer import notification # pip install plyer
+from .notifications import notify
+from .screens import Screen
+from .ticker import CountdownTimer
 
-class SimpleTimers:
-    def __init__(self, root):
-        self.root = root
-        self.timer_running = False
-        self.remaining_time = None
-        self.root['background'] = '#ff458c'
-        self.root.minsize(width=1280, height=720)
+class SimpleTimers(Screen):
+    background = '#ff458c'
+    min_size = (1280, 720)
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
+        self.timer = CountdownTimer(self.root, self.show_remaining, self.timer_finished)
 
         self.create_timer_ui()
 
-    def create_timer_ui(self):
-        
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#ff458c')
+    def on_show(self):
+        super().on_show()
+        self.timer.show()
 
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
+    def on_hide(self):
+        # A running timer still goes off on time while hidden; only the display stops ticking
+        self.timer.hide()
 
-        home_button = ttk.Button(self.root, text='Home', style='Custom.TButton', command=self.return_home).pack(anchor=tk.NW, padx=30, pady=30)
+    def destroy(self):
+        self.timer.stop()
+        super().destroy()
+
+    def create_timer_ui(self):
+        home_button = ttk.Button(self.frame, text='Home', style='Custom.TButton', command=self.return_home).pack(anchor=tk.NW, padx=30, pady=30)
 
         # Main frame
-        main_frame = ttk.Frame(self.root, style='Custom.TFrame', padding=20)
+        main_frame = ttk.Frame(self.frame, style='Custom.TFrame', padding=20)
         main_frame.pack(fill="both", expand=True)
 
         ttk.Label(main_frame, text="Simple Timers", background='#ff458c', font=("Arial", 30)).pack(pady=10)
@@ -73,14 +80,12 @@ class SimpleTimers:
         self.reset_button.pack(side="left", padx=10)
 
     def start_timer(self, seconds):
-        if self.timer_running:
+        if self.timer.running:
             return
 
-        self.remaining_time = seconds
-        self.timer_running = True
         self.pause_button["state"] = "normal"
         self.reset_button["state"] = "normal"
-        self.update_timer()
+        self.timer.start(seconds)
 
     def start_custom_timer(self):
         try:
@@ -100,43 +105,34 @@ class SimpleTimers:
 
         self.start_timer(total_seconds)
 
-    def update_timer(self):
-        if self.remaining_time is None or not self.timer_running:
-            return
-
-        hours, remainder = divmod(self.remaining_time, 3600)
+    def show_remaining(self, remaining):
+        hours, remainder = divmod(remaining, 3600)
         minutes, seconds = divmod(remainder, 60)
 
         self.timer_label.config(text=f"{hours:02}:{minutes:02}:{seconds:02}")
 
-        if self.remaining_time > 0:
-            self.remaining_time -= 1
-            self.root.after(1000, self.update_timer)
-        else:
-            self.timer_running = False
-            self.pause_button["state"] = "disabled"
-            notification.notify(
-              title="Simple Timer",
-              message="Time's Up! Your timer has ended.",
-              app_name="Simple Timer",
-              timeout=10
-            )
+    def timer_finished(self):
+        self.pause_button["state"] = "disabled"
+        notify(
+          title="Simple Timer",
+          message="Time's Up! Your timer has ended.",
+          app_name="Simple Timer",
+          timeout=10
+        )
 
     def pause_timer(self):
-        self.timer_running = False
+        self.timer.pause()
         self.pause_button["state"] = "disabled"
         self.resume_button["state"] = "normal"
 
     def resume_timer(self):
-        if not self.timer_running and self.remaining_time is not None:
-            self.timer_running = True
+        if self.timer.paused:
+            self.timer.resume()
             self.resume_button["state"] = "disabled"
             self.pause_button["state"] = "normal"
-            self.update_timer()
 
     def reset_timer(self):
-        self.timer_running = False
-        self.remaining_time = None
+        self.timer.stop()
         self.timer_label.config(text="00:00:00")
         self.pause_button["state"] = "disabled"
         self.resume_button["state"] = "disabled"
@@ -146,10 +142,5 @@ class SimpleTimers:
         self.seconds_var.set("0")
 
     def return_home(self):
-        from main import SmartClockApp
-        
-        self.timer_running = False
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
-        SmartClockApp(self.root)
\ No newline at end of file
+        self.reset_timer()
+        self.app.show("home")
@@ -2,68 +2,70 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 from datetime import datetime
-import os
 import sqlite3
+from .database import get_connection
+from .db_executor import QueryGroup, get_executor
+from .dispatch import get_dispatcher
+from .screens import Screen
+from .stores import SleepStore
+from .write_queue import get_write_queue
 
-class SleepLogger:
-    def __init__(self, root):
-        self.root = root
-        self.root['background'] = '#ffedd0'
-        self.root.minsize(width=1280, height=950)
+class SleepLogger(Screen):
+    background = '#ffedd0'
+    min_size = (1280, 950)
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
 
         # Initialize database
         self.conn = None
-        self.cursor = None
+        self.logs = None
+        self.writes = get_write_queue()
+        self.ui = get_dispatcher(self.root)
+        self.queries = QueryGroup(get_executor(), self.ui)
         self.open_db_conn()
 
         self.create_sleep_logger_ui()
 
     def open_db_conn(self):
-        '''Open and intitialize the database'''
+        '''Borrow the shared database connection. The schema is set up once per process'''
         if self.conn is None:
-            db_dir = os.path.join(os.getcwd(), "data")
-            self.conn = sqlite3.connect(f"{db_dir}/tasks.db")
-            self.cursor = self.conn.cursor()
-            self.setup_database()
+            self.conn = get_connection()
+            self.logs = SleepStore(self.conn)
 
     def close_db_conn(self):
-        '''Close the connection to the SQLite database.'''
+        '''Release the shared connection. It stays open for the next screen'''
+        self.queries.cancel()
         if self.conn:
-            self.conn.close()
             self.conn = None
-            self.cursor = None
+            self.logs = None
 
-    def return_to_home(self):
-        from main import SmartClockApp
-        '''Return to the home screen'''
-        self.close_db_conn()
-        SmartClockApp(self.root)
-
-    def setup_database(self):
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sleep_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL UNIQUE,
-                hours_slept REAL NOT NULL
-            )
-        ''')
-        self.conn.commit()
+    def on_show(self):
+        '''Reload the logs only if the data changed while the screen was hidden'''
+        super().on_show()
+        if self.data_changed():
+            self.load_logs()
 
-    def create_sleep_logger_ui(self):
+    def on_hide(self):
+        if self.queries.cancel():
+            self.forget_data_version()
 
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#ffedd0')
+    def destroy(self):
+        super().destroy()
+        self.close_db_conn()
 
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
+    def return_to_home(self):
+        '''Return to the home screen'''
+        self.app.show("home")
 
-        home_button = ttk.Button(self.root, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
+    def create_sleep_logger_ui(self):
+        home_button = ttk.Button(self.frame, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
 
         # Split UI into left and right frames
-        self.left_frame = ttk.Frame(self.root, style='Custom.TFrame', padding=10)
+        self.left_frame = ttk.Frame(self.frame, style='Custom.TFrame', padding=10)
         self.left_frame.pack(side="left", fill="y", padx=10, pady=10)
 
-        self.right_frame = ttk.Frame(self.root, style='Custom.TFrame', padding=10)
+        self.right_frame = ttk.Frame(self.frame, style='Custom.TFrame', padding=10)
         self.right_frame.pack(side="right", expand=True, fill="both", padx=10, pady=10)
 
         log_frame = ttk.Frame(self.left_frame, style='Custom.TFrame')
@@ -97,8 +99,6 @@ class SleepLogger:
         # Delete Button
         ttk.Button(self.right_frame, style='Custom.TButton', text="Delete Log", command=self.delete_log).pack(pady=10)
 
-        self.load_logs()
-
     def create_date_incrementer(self, frame):
         '''Create a date incrementer with spinboxes for month, day, and year'''
         ttk.Label(frame, anchor='center', background='#ffedd0', text="Date (MM-DD-YYYY):").pack(anchor="w", pady=5)
@@ -111,17 +111,17 @@ class SleepLogger:
 
         month_var = tk.StringVar(value=str(datetime.now().month))
         month_spinbox = ttk.Spinbox(date_frame, from_=1, to=12, width=3, textvariable=month_var, validate='key')
-        month_spinbox.configure(validatecommand=(self.root.register(self.validate_month), '%P'))
+        month_spinbox.configure(validatecommand=(self.register_command(self.validate_month), '%P'))
         month_spinbox.grid(row=0, column=0, padx=5)
 
         date_var = tk.StringVar(value=str(datetime.now().day))
         date_spinbox = ttk.Spinbox(date_frame, from_=1, to=31, width=3, textvariable=date_var, validate='key')
-        date_spinbox.configure(validatecommand=(self.root.register(lambda value: self.validate_day(value, year_var, month_var)), '%P'))
+        date_spinbox.configure(validatecommand=(self.register_command(self.validate_day), '%P'))
         date_spinbox.grid(row=0, column=1, padx=5)
 
         year_var = tk.StringVar(value=str(datetime.now().year))
         year_spinbox = ttk.Spinbox(date_frame, from_=2024, to=2040, width=6, textvariable=year_var, validate='key')
-        year_spinbox.configure(validatecommand=(self.root.register(self.validate_year), '%P'))
+        year_spinbox.configure(validatecommand=(self.register_command(self.validate_year), '%P'))
         year_spinbox.grid(row=0, column=2, padx=5)
 
         return (month_var, date_var, year_var)
@@ -133,9 +133,10 @@ class SleepLogger:
             return month >= 1 and month <= 12
         return False
 
-    def validate_day(self, value, year_var, month_var):
-        '''Validate the day spinbox'''
+    def validate_day(self, value):
+        '''Validate the day spinbox against the month and year of the date being edited'''
         if value.isdigit():
+            month_var, _, year_var = self.date_vars
             day = int(value)
             month = int(month_var.get())
             year = int(year_var.get())
@@ -174,26 +175,43 @@ class SleepLogger:
             messagebox.showerror("Error", "Hours slept must be a number and must be between 0 and 24 inclusive.")
             return
 
+        future = self.writes.submit(lambda conn: SleepStore(conn).add(date, hours_slept))
+        self.ui.when_done(future, self.on_log_saved)
+
+    def on_log_saved(self, future):
+        '''Reload the logs and clear the form once a new or edited log is committed'''
         try:
-            self.cursor.execute(
-                "INSERT INTO sleep_logs (date, hours_slept) VALUES (?, ?)",
-                (date, hours_slept)
-            )
-            self.conn.commit()
-            self.load_logs()
-            self.clear_form()
+            future.result()
         except sqlite3.IntegrityError:
             messagebox.showerror("Error", "A log for this date already exists.")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to save sleep log: {e}")
+            if self.conn is not None:
+                self.load_logs()
+            return
+
+        if self.conn is not None:
+            self.load_logs()
+            self.clear_form()
 
     def load_logs(self):
+        '''Fetch the logs in the background'''
+        self.logs_label.config(text="Sleep Logs (loading...)")
+        self.queries.run("logs", lambda conn: SleepStore(conn).all(), self.show_logs, self.on_logs_failed)
+
+    def on_logs_failed(self, error):
+        self.logs_label.config(text="Sleep Logs")
+        messagebox.showerror("Error", f"Failed to load sleep logs: {error}")
+
+    def show_logs(self, logs):
         # Clear the treeview
+        self.logs_label.config(text="Sleep Logs")
         for row in self.logs_tree.get_children():
             self.logs_tree.delete(row)
 
-        # Fetch and populate logs
-        self.cursor.execute("SELECT id, date, hours_slept FROM sleep_logs")
-        for log in self.cursor.fetchall():
-            self.logs_tree.insert("", "end", iid=log[0], values=(log[1], log[2]))
+        for log in logs:
+            self.logs_tree.insert("", "end", iid=log.id, values=(log.date, log.hours_slept))
 
     def on_log_select(self, event):
         selected_item = self.logs_tree.selection()
@@ -201,15 +219,14 @@ class SleepLogger:
             return
 
         log_id = selected_item[0]
-        self.cursor.execute("SELECT date, hours_slept FROM sleep_logs WHERE id = ?", (log_id,))
-        log = self.cursor.fetchone()
+        log = self.logs.get(log_id)
 
         if log:
-            date_parts = log[0].split("-")
+            date_parts = log.date.split("-")
             self.date_vars[0].set(date_parts[1])  # Month
             self.date_vars[1].set(date_parts[2])  # Day
             self.date_vars[2].set(date_parts[0])  # Year
-            self.hours_slept_var.set(log[1])
+            self.hours_slept_var.set(log.hours_slept)
 
     def update_log(self):
         selected_item = self.logs_tree.selection()
@@ -235,13 +252,8 @@ class SleepLogger:
             messagebox.showerror("Error", "Hours slept must be a number.")
             return
 
-        self.cursor.execute(
-            "UPDATE sleep_logs SET date = ?, hours_slept = ? WHERE id = ?",
-            (date, hours_slept, log_id)
-        )
-        self.conn.commit()
-        self.load_logs()
-        self.clear_form()
+        future = self.writes.submit(lambda conn: SleepStore(conn).update(log_id, date, hours_slept))
+        self.ui.when_done(future, self.on_log_saved)
 
     def delete_log(self):
         selected_item = self.logs_tree.selection()
@@ -250,17 +262,20 @@ class SleepLogger:
             return
 
         log_id = selected_item[0]
-        self.cursor.execute("DELETE FROM sleep_logs WHERE id = ?", (log_id,))
-        self.conn.commit()
-        self.load_logs()
+        future = self.writes.submit(lambda conn: SleepStore(conn).delete(log_id))
+        self.ui.when_done(future, self.on_log_deleted)
+
+    def on_log_deleted(self, future):
+        '''Reload the logs once a delete is committed, or after it failed and was rolled back'''
+        try:
+            future.result()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to delete sleep log: {e}")
+        if self.conn is not None:
+            self.load_logs()
 
     def clear_form(self):
         self.date_vars[0].set(str(datetime.now().month))  # Month
         self.date_vars[1].set(str(datetime.now().day))    # Day
         self.date_vars[2].set(str(datetime.now().year))   # Year
         self.hours_slept_var.set("")
-
-    def return_home(self):
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        self.go_home()
\ No newline at end of file
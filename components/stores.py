@@ -0,0 +1,322 @@
+'''Data access for tasks, habits, sleep logs and pomodoro history, independent of Tk.
+
+Each store wraps one sqlite3 connection. SQL lives in module-level constants so
+every call site passes the identical string and reuses sqlite3's per-connection
+prepared statement cache. Mutating methods run inside Store.transaction(), so a
+multi-statement change (a new tag plus the task that uses it) is committed or
+rolled back as a unit.
+'''
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from .database import TASKS_FTS_INSERT_TRIGGER
+from .name_cache import category_cache, tag_cache
+
+TaskRow = namedtuple("TaskRow", "id title due_date due_time description tag status")
+HabitRow = namedtuple("HabitRow", "name frequency status start_date category")
+SleepLogRow = namedtuple("SleepLogRow", "id date hours_slept")
+PomodoroTotals = namedtuple("PomodoroTotals", "period work_sessions work_seconds break_sessions break_seconds")
+PomodoroTagTotals = namedtuple("PomodoroTagTotals", "tag work_sessions work_seconds")
+
+TASK_ROW_SELECT = '''
+    SELECT tasks.id, tasks.title, tasks.due_date, tasks.due_time, tasks.description, tags.name, tasks.status
+    FROM tasks
+    LEFT JOIN tags ON tasks.tag_id = tags.id
+'''
+TASK_BY_ID = f"{TASK_ROW_SELECT} WHERE tasks.id = ?"
+TASKS_FROM = f"{TASK_ROW_SELECT} WHERE tasks.id >= ? ORDER BY tasks.id LIMIT ?"
+TASKS_AFTER = f"{TASK_ROW_SELECT} WHERE tasks.id > ? ORDER BY tasks.id LIMIT ?"
+TASKS_BEFORE = f"{TASK_ROW_SELECT} WHERE tasks.id < ? ORDER BY tasks.id DESC LIMIT ?"
+TASKS_ACTIVE = f"{TASK_ROW_SELECT} WHERE tasks.status IN ('overdue', 'upcoming')"
+TASKS_ALL = f"{TASK_ROW_SELECT} ORDER BY tasks.id"
+TASKS_SEARCH = '''
+    SELECT tasks.id, tasks.title, tasks.due_date, tasks.due_time, tasks.description, tags.name, tasks.status
+    FROM tasks_fts
+    JOIN tasks ON tasks.id = tasks_fts.rowid
+    LEFT JOIN tags ON tasks.tag_id = tags.id
+    WHERE tasks_fts MATCH ?
+    ORDER BY bm25(tasks_fts, 10.0, 1.0, 5.0)
+    LIMIT ?
+'''
+TASK_INSERT = "INSERT INTO tasks (title, due_date, due_time, description, tag_id, status) VALUES (?, ?, ?, ?, ?, ?)"
+TASK_INSERT_OR_IGNORE = "INSERT OR IGNORE INTO tasks (title, due_date, due_time, description, tag_id, status) VALUES (?, ?, ?, ?, ?, ?)"
+# Completed tasks keep their status when edited
+TASK_UPDATE = '''
+    UPDATE tasks SET title = ?, due_date = ?, due_time = ?, description = ?, tag_id = ?,
+    status = CASE WHEN status = 'completed' THEN status ELSE ? END
+    WHERE id = ?
+'''
+TASKS_FTS_INDEX_AFTER = '''
+    INSERT INTO tasks_fts (rowid, title, description, tag)
+    SELECT tasks.id, tasks.title, tasks.description, tags.name
+    FROM tasks
+    LEFT JOIN tags ON tasks.tag_id = tags.id
+    WHERE tasks.id > ?
+'''
+TASKS_MARK_OVERDUE = '''
+    UPDATE tasks SET status = 'overdue'
+    WHERE status = 'upcoming' AND due_date <= ?
+      AND (due_date < ? OR due_time IS NULL OR due_time <= ?)
+'''
+TASKS_NEXT_DUE = '''
+    SELECT due_date, due_time FROM tasks
+    WHERE status = 'upcoming'
+    ORDER BY due_date, due_time
+    LIMIT 1
+'''
+
+HABITS_ALL = '''
+    SELECT habits.name, habits.frequency, habits.status, habits.start_date, categories.name
+    FROM habits
+    LEFT JOIN categories ON habits.category_id = categories.id
+'''
+HABIT_INSERT = '''
+    INSERT INTO habits (name, description, frequency, status, start_date, progress, category_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+HABIT_UPDATE = '''
+    UPDATE habits
+    SET name = ?, description = ?, frequency = ?, status = ?, start_date = ?, progress = ?, category_id = ?
+    WHERE name = ?
+'''
+
+# Work intervals keep the tag their task had at the time
+POMODORO_INSERT = '''
+    INSERT INTO pomodoro_sessions (phase, started_at, ended_at, seconds, task_id, tag_id)
+    VALUES (?, ?, ?, ?, ?, (SELECT tag_id FROM tasks WHERE id = ?))
+'''
+POMODORO_DAYS = '''
+    SELECT day, work_sessions, work_seconds, break_sessions, break_seconds
+    FROM pomodoro_daily
+    WHERE day BETWEEN ? AND ?
+    ORDER BY day
+'''
+POMODORO_WEEK = "SELECT week, work_sessions, work_seconds, break_sessions, break_seconds FROM pomodoro_weekly WHERE week = ?"
+POMODORO_TOP_TAGS = '''
+    SELECT tags.name, pomodoro_tag_totals.work_sessions, pomodoro_tag_totals.work_seconds
+    FROM pomodoro_tag_totals
+    JOIN tags ON tags.id = pomodoro_tag_totals.tag_id
+    WHERE pomodoro_tag_totals.work_sessions > 0
+    ORDER BY pomodoro_tag_totals.work_seconds DESC
+    LIMIT ?
+'''
+
+class Store:
+    '''Base class for the stores: one connection plus transaction handling'''
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def transaction(self):
+        '''Run a block atomically. Blocks nested inside another transaction join it'''
+        if self.conn.in_transaction:
+            yield
+            return
+
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            # Names inserted by the rolled back block are gone from the tables too
+            tag_cache.invalidate()
+            category_cache.invalidate()
+            raise
+        self.conn.commit()
+
+    def fetch_value(self, sql, params=()):
+        '''Return the first column of the first row, or None'''
+        row = self.conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+class TaskStore(Store):
+    '''Tasks and their tags'''
+    def count(self):
+        return self.fetch_value("SELECT COUNT(*) FROM tasks")
+
+    def id_bounds(self):
+        '''Return (smallest id, largest id), or (0, 0) for an empty table'''
+        return (self.fetch_value("SELECT MIN(id) FROM tasks") or 0, self.fetch_value("SELECT MAX(id) FROM tasks") or 0)
+
+    def get(self, task_id):
+        row = self.conn.execute(TASK_BY_ID, (task_id,)).fetchone()
+        return TaskRow._make(row) if row else None
+
+    def page_from(self, task_id, limit):
+        '''Keyset page of up to limit tasks with id >= task_id'''
+        return list(map(TaskRow._make, self.conn.execute(TASKS_FROM, (task_id, limit))))
+
+    def page_after(self, task_id, limit):
+        '''Keyset page of up to limit tasks with id > task_id'''
+        return list(map(TaskRow._make, self.conn.execute(TASKS_AFTER, (task_id, limit))))
+
+    def page_before(self, task_id, limit):
+        '''Keyset page of up to limit tasks with id < task_id, in ascending order'''
+        return list(map(TaskRow._make, self.conn.execute(TASKS_BEFORE, (task_id, limit))))[::-1]
+
+    def active(self):
+        '''Every overdue or upcoming task'''
+        return list(map(TaskRow._make, self.conn.execute(TASKS_ACTIVE)))
+
+    def search(self, words, limit):
+        '''Best full-text matches for words, each matched as a prefix'''
+        query = " ".join(f'"{word}"*' for word in words)
+        return list(map(TaskRow._make, self.conn.execute(TASKS_SEARCH, (query, limit))))
+
+    def iter_all(self, batch_size):
+        '''Yield every task, holding at most batch_size rows in memory'''
+        cursor = self.conn.execute(TASKS_ALL)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from map(TaskRow._make, rows)
+
+    def description(self, task_id):
+        return self.fetch_value("SELECT description FROM tasks WHERE id = ?", (task_id,))
+
+    def create(self, title, due_date, due_time, description, tag_name, status):
+        '''Insert a task, creating its tag if needed, and return the new id'''
+        with self.transaction():
+            tag_id = tag_cache.id_for(self.conn, tag_name)
+            return self.conn.execute(TASK_INSERT, (title, due_date, due_time, description, tag_id, status)).lastrowid
+
+    def create_many(self, tasks):
+        '''Insert (title, due_date, due_time, description, tag_name, status) tuples in one batch.
+
+        Tags are resolved together and duplicate titles are skipped. Returns how many were inserted.
+        '''
+        with self.transaction():
+            tag_ids = tag_cache.ids_for(self.conn, {task[4] for task in tasks})
+            return self.conn.executemany(
+                TASK_INSERT_OR_IGNORE,
+                [(title, due_date, due_time, description, tag_ids[tag], status)
+                 for title, due_date, due_time, description, tag, status in tasks]
+            ).rowcount
+
+    @contextmanager
+    def deferred_search_index(self):
+        '''Index the tasks inserted in the block with one statement instead of a trigger per row.
+
+        The insert trigger is dropped and recreated inside the same transaction,
+        so other connections never see the table without it.
+        '''
+        with self.transaction():
+            last_id = self.fetch_value("SELECT max(id) FROM tasks") or 0
+            self.conn.execute("DROP TRIGGER IF EXISTS tasks_fts_insert")
+            yield
+            self.conn.execute(TASKS_FTS_INDEX_AFTER, (last_id,))
+            self.conn.execute(TASKS_FTS_INSERT_TRIGGER)
+
+    def update(self, task_id, title, due_date, due_time, description, tag_name, status):
+        '''Edit a task. status is ignored for completed tasks'''
+        with self.transaction():
+            tag_id = tag_cache.id_for(self.conn, tag_name)
+            self.conn.execute(TASK_UPDATE, (title, due_date, due_time, description, tag_id, status, task_id))
+
+    def mark_complete(self, task_id):
+        with self.transaction():
+            self.conn.execute("UPDATE tasks SET status = 'completed' WHERE id = ?", (task_id,))
+
+    def delete(self, task_id):
+        with self.transaction():
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def mark_overdue(self, now=None):
+        '''Move every upcoming task whose due time has passed to overdue, and return how many moved.
+
+        This is a single set-based UPDATE that walks the (status, due_date, due_time) index,
+        so it only touches rows that actually change.
+        '''
+        now = now or datetime.now()
+        today = now.strftime("%Y-%m-%d")
+        with self.transaction():
+            return self.conn.execute(TASKS_MARK_OVERDUE, (today, today, now.strftime("%H:%M"))).rowcount
+
+    def next_due(self):
+        '''Return (due_date, due_time) of the earliest upcoming task, or None'''
+        return self.conn.execute(TASKS_NEXT_DUE).fetchone()
+
+    def tag_names(self):
+        return tag_cache.names(self.conn)
+
+    def add_tag(self, name):
+        with self.transaction():
+            tag_cache.id_for(self.conn, name)
+
+class HabitStore(Store):
+    '''Habits and their categories. Habits are identified by name'''
+    def all(self):
+        return list(map(HabitRow._make, self.conn.execute(HABITS_ALL)))
+
+    def description(self, name):
+        return self.fetch_value("SELECT description FROM habits WHERE name = ?", (name,))
+
+    def progress(self, name):
+        return self.fetch_value("SELECT progress FROM habits WHERE name = ?", (name,))
+
+    def save(self, name, description, frequency, status, start_date, progress, category, original_name=None):
+        '''Insert a habit, or update the habit called original_name. Creates the category if needed'''
+        with self.transaction():
+            category_id = category_cache.id_for(self.conn, category)
+            if original_name is None:
+                self.conn.execute(HABIT_INSERT, (name, description, frequency, status, start_date, progress, category_id))
+            else:
+                self.conn.execute(HABIT_UPDATE, (name, description, frequency, status, start_date, progress, category_id, original_name))
+
+    def delete(self, name):
+        with self.transaction():
+            self.conn.execute("DELETE FROM habits WHERE name = ?", (name,))
+
+    def category_names(self):
+        return category_cache.names(self.conn)
+
+    def add_category(self, name):
+        with self.transaction():
+            category_cache.id_for(self.conn, name)
+
+class SleepStore(Store):
+    '''Nightly sleep logs, one per date'''
+    def all(self):
+        return list(map(SleepLogRow._make, self.conn.execute("SELECT id, date, hours_slept FROM sleep_logs")))
+
+    def get(self, log_id):
+        row = self.conn.execute("SELECT id, date, hours_slept FROM sleep_logs WHERE id = ?", (log_id,)).fetchone()
+        return SleepLogRow._make(row) if row else None
+
+    def latest_hours(self):
+        '''Hours slept on the most recent logged night, or None'''
+        return self.fetch_value("SELECT hours_slept FROM sleep_logs ORDER BY date DESC LIMIT 1")
+
+    def add(self, date, hours_slept):
+        '''Insert a log. Raises sqlite3.IntegrityError if the date is already logged'''
+        with self.transaction():
+            return self.conn.execute("INSERT INTO sleep_logs (date, hours_slept) VALUES (?, ?)", (date, hours_slept)).lastrowid
+
+    def update(self, log_id, date, hours_slept):
+        with self.transaction():
+            self.conn.execute("UPDATE sleep_logs SET date = ?, hours_slept = ? WHERE id = ?", (date, hours_slept, log_id))
+
+    def delete(self, log_id):
+        with self.transaction():
+            self.conn.execute("DELETE FROM sleep_logs WHERE id = ?", (log_id,))
+
+class PomodoroStore(Store):
+    '''Completed pomodoro intervals. Stats read only the rollup tables, never the history'''
+    def record(self, phase, started_at, ended_at, seconds, task_id=None):
+        '''Save a completed interval. Triggers add it to the daily, weekly and per-tag rollups'''
+        with self.transaction():
+            return self.conn.execute(POMODORO_INSERT, (phase, started_at, ended_at, seconds, task_id, task_id)).lastrowid
+
+    def days(self, first_day, last_day):
+        '''Totals for each day in the range that has any, oldest first'''
+        return list(map(PomodoroTotals._make, self.conn.execute(POMODORO_DAYS, (first_day, last_day))))
+
+    def week(self, monday):
+        '''Totals for the week starting on monday, or None'''
+        row = self.conn.execute(POMODORO_WEEK, (monday,)).fetchone()
+        return PomodoroTotals._make(row) if row else None
+
+    def top_tags(self, limit):
+        '''The tags with the most focused time, all time'''
+        return list(map(PomodoroTagTotals._make, self.conn.execute(POMODORO_TOP_TAGS, (limit,))))
@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+from datetime import date, time
+from itertools import islice
+
+TASK_FIELDS = ["title", "due_date", "due_time", "description", "tag", "status"]
+BATCH_SIZE = 5000
+
+def get_format(path):
+    '''Return 'csv' or 'jsonl' based on the file extension'''
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type '{extension}'. Use .csv or .jsonl")
+
+def iter_tasks(store, batch_size=BATCH_SIZE):
+    '''Yield every task as a dict, holding at most batch_size rows in memory'''
+    for task in store.iter_all(batch_size):
+        yield dict(zip(TASK_FIELDS, task[1:]))  # Everything but the id
+
+def export_tasks(store, path):
+    '''Stream every task to a CSV or JSONL file and return how many were written'''
+    file_format = get_format(path)
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            writer = csv.DictWriter(file, fieldnames=TASK_FIELDS)
+            writer.writeheader()
+            for task in iter_tasks(store):
+                writer.writerow(task)
+                count += 1
+        else:
+            for task in iter_tasks(store):
+                file.write(json.dumps(task) + "\n")
+                count += 1
+    return count
+
+def read_tasks(file, file_format):
+    '''Yield (line number, task dict) pairs from an open CSV or JSONL file'''
+    if file_format == "csv":
+        # Line 1 is the header
+        yield from enumerate(csv.DictReader(file), start=2)
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {line_number}: invalid JSON ({e.msg}).")
+
+def parse_task(line_number, task):
+    '''Validate one imported task and return (title, due_date, due_time, description, tag, status)'''
+    if not isinstance(task, dict):
+        raise ValueError(f"Line {line_number}: expected an object with the task fields.")
+    for field in TASK_FIELDS:
+        if task.get(field) is not None and not isinstance(task[field], str):
+            raise ValueError(f"Line {line_number}: {field} must be text.")
+
+    title = (task.get("title") or "").strip()
+    if not title:
+        raise ValueError(f"Line {line_number}: title cannot be empty.")
+
+    try:
+        due_date = date.fromisoformat((task.get("due_date") or "").strip()).isoformat()
+        due_time = (task.get("due_time") or "").strip()
+        due_time = time.fromisoformat(due_time).strftime("%H:%M") if due_time else None
+    except ValueError:
+        raise ValueError(f"Line {line_number}: due date must be YYYY-MM-DD and due time HH:MM.")
+
+    tag = (task.get("tag") or "").strip() or "misc"
+    # Only 'completed' is taken from the file. Everything else is recomputed after the import.
+    status = "completed" if task.get("status") == "completed" else "upcoming"
+    return (title, due_date, due_time, task.get("description") or "", tag, status)
+
+def import_tasks(store, path, batch_size=BATCH_SIZE):
+    '''Stream tasks from a CSV or JSONL file into the database in one transaction.
+
+    Tasks whose title already exists are skipped. Returns (imported, skipped).
+    Any invalid row aborts the whole import.
+    '''
+    file_format = get_format(path)
+    imported = 0
+    total = 0
+
+    with open(path, newline="", encoding="utf-8") as file:
+        rows = read_tasks(file, file_format)
+        with store.deferred_search_index():
+            while True:
+                batch = [parse_task(line_number, task) for line_number, task in islice(rows, batch_size)]
+                if not batch:
+                    break
+                imported += store.create_many(batch)
+                total += len(batch)
+            # Flag the imported tasks that are already past due before everything commits at once
+            store.mark_overdue()
+
+    return imported, total - imported
@@ -0,0 +1,307 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+class VirtualTaskList:
+    '''A task Listbox that only holds the rows currently on screen.
+
+    Rows are read with keyset pagination on tasks.id, so the widget and the
+    buffer never hold more than height + 2 * overscan tasks, however large
+    the tasks table grows. Given a QueryGroup, refresh() reads in the background.
+    '''
+    def __init__(self, parent, store, format_row, height=20, width=50, overscan=10, queries=None):
+        self.store = store
+        self.queries = queries
+        self.format_row = format_row
+        self.height = height
+        self.overscan = overscan
+
+        self.rows = []  # Buffered window of task rows, ordered by id
+        self.top = 0  # Index into self.rows of the first visible row
+        self.total = 0
+        self.min_id = 0
+        self.max_id = 0
+        self.selected_id = None
+        self.search_rows = None  # Ranked search results, shown instead of the table while searching
+
+        self.frame = ttk.Frame(parent, style='Custom.TFrame')
+        self.listbox = tk.Listbox(self.frame, height=height, width=width, exportselection=False)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # The Listbox only ever contains the visible rows, so all scrolling is routed through us
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_mousewheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_by(-3) or "break")
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_by(3) or "break")
+        self.listbox.bind("<Up>", lambda event: self.move_selection(-1))
+        self.listbox.bind("<Down>", lambda event: self.move_selection(1))
+        self.listbox.bind("<Prior>", lambda event: self.scroll_by(-self.height) or "break")
+        self.listbox.bind("<Next>", lambda event: self.scroll_by(self.height) or "break")
+
+    def pack(self, **kwargs):
+        '''Pack the list and its scrollbar'''
+        self.frame.pack(**kwargs)
+
+    def refresh(self):
+        '''Re-read the table bounds and reload the window around the current position'''
+        anchor = self.rows[self.top].id if self.top < len(self.rows) else None
+        if self.queries is None:
+            self.show_window(self.read_window(self.store, anchor))
+            return
+
+        # The placeholder is not a task, so nothing can be selected until the rows arrive
+        self.rows = []
+        self.top = 0
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.delete(0, tk.END)
+        self.listbox.insert(0, "Loading...")
+        self.listbox.configure(state=tk.DISABLED)
+        store_type = type(self.store)
+        self.queries.run("task-window", lambda conn: self.read_window(store_type(conn), anchor), self.show_window, self.on_window_failed)
+
+    def read_window(self, store, anchor_id):
+        '''Read the table size, its id bounds and the rows around anchor_id (default: the first task)'''
+        total = store.count()
+        min_id, max_id = store.id_bounds()
+        if anchor_id is None:
+            anchor_id = min_id
+        before = store.page_before(anchor_id, self.height + self.overscan)
+        after = store.page_from(anchor_id, self.height + self.overscan)
+        return total, min_id, max_id, before, after
+
+    def show_window(self, window):
+        '''Show a window read by read_window, unless a search took over the list meanwhile'''
+        if self.search_rows is not None:
+            return
+        self.total, self.min_id, self.max_id, before, after = window
+        self.set_rows(before, after)
+
+    def on_window_failed(self, error):
+        '''Drop the placeholder and report a failed read'''
+        self.render()
+        messagebox.showerror("Error", f"Failed to load tasks: {error}")
+
+    def show_search_results(self, rows):
+        '''Show a bounded list of search results instead of the table'''
+        self.search_rows = rows
+        self.rows = list(rows)
+        self.top = 0
+        self.render()
+
+    def clear_search(self):
+        '''Go back to paging through the whole table'''
+        if self.search_rows is not None:
+            self.search_rows = None
+            self.rows = []
+            self.refresh()
+
+    def selected_task(self):
+        '''Return the row of the selected task, or None if nothing is selected'''
+        selection = self.listbox.curselection()
+        if not selection or self.top + selection[0] >= len(self.rows):
+            return None
+        return self.rows[self.top + selection[0]]
+
+    def fetch_from(self, task_id, limit):
+        '''Fetch up to limit rows with id >= task_id'''
+        return self.store.page_from(task_id, limit)
+
+    def fetch_after(self, task_id, limit):
+        '''Fetch up to limit rows with id > task_id'''
+        if self.search_rows is not None:
+            return []
+        return self.store.page_after(task_id, limit)
+
+    def fetch_before(self, task_id, limit):
+        '''Fetch up to limit rows with id < task_id, in ascending order'''
+        if self.search_rows is not None:
+            return []
+        return self.store.page_before(task_id, limit)
+
+    def load_around(self, anchor_id):
+        '''Replace the buffer with a window starting at anchor_id'''
+        before = self.fetch_before(anchor_id, self.height + self.overscan)
+        after = self.fetch_from(anchor_id, self.height + self.overscan)
+        self.set_rows(before, after)
+
+    def set_rows(self, before, after):
+        '''Replace the buffer with the rows before and from the anchor'''
+        self.rows = before + after
+        # Near the end of the table, pull the window back so it stays full
+        self.top = max(0, min(len(before), len(self.rows) - self.height))
+        self.trim()
+        self.render()
+
+    def scroll_by(self, count):
+        '''Scroll the visible window by count rows'''
+        if not self.rows:
+            return
+        top = self.top + count
+
+        if top < 0:
+            extra = self.fetch_before(self.rows[0].id, -top + self.overscan)
+            self.rows = extra + self.rows
+            top = max(0, top + len(extra))
+
+        if top + self.height > len(self.rows):
+            extra = self.fetch_after(self.rows[-1].id, top + self.height - len(self.rows) + self.overscan)
+            self.rows = self.rows + extra
+            top = max(0, min(top, len(self.rows) - self.height))
+
+        self.top = top
+        self.trim()
+        self.render()
+
+    def buffer_index(self, task_id):
+        '''Return the buffer index of task_id, or None if it is outside the window'''
+        for index, row in enumerate(self.rows):
+            if row.id == task_id:
+                return index
+        return None
+
+    def insert_row(self, task_id):
+        '''Show a newly created task without reloading the window'''
+        at_end = not self.rows or self.rows[-1].id >= self.max_id
+        self.total += 1
+        self.max_id = max(self.max_id, task_id)
+        if not self.min_id:
+            self.min_id = task_id
+
+        # New ids are always the largest, so the row only matters if the window reaches the end
+        if self.search_rows is None and at_end and len(self.rows) - self.top < self.height + self.overscan:
+            self.rows.append(self.store.get(task_id))
+            index = len(self.rows) - 1 - self.top
+            if index < self.height:
+                self.listbox.insert(index, self.format_row(self.rows[-1]))
+        self.update_scrollbar(self.rows[self.top:self.top + self.height])
+
+    def update_row(self, task_id):
+        '''Redraw a single edited task in place'''
+        index = self.buffer_index(task_id)
+        if index is None:
+            return
+        self.rows[index] = self.store.get(task_id)
+
+        line = index - self.top
+        if 0 <= line < self.height:
+            self.listbox.delete(line)
+            self.listbox.insert(line, self.format_row(self.rows[index]))
+            if task_id == self.selected_id:
+                self.listbox.selection_set(line)
+
+    def remove_row(self, task_id):
+        '''Drop a deleted task from the window, pulling in one row to fill the gap'''
+        self.total -= 1
+        if task_id in (self.min_id, self.max_id):
+            self.min_id, self.max_id = self.store.id_bounds()
+        if task_id == self.selected_id:
+            self.selected_id = None
+
+        index = self.buffer_index(task_id)
+        if index is None:
+            self.update_scrollbar(self.rows[self.top:self.top + self.height])
+            return
+        del self.rows[index]
+
+        line = index - self.top
+        if line < 0:
+            self.top -= 1
+        elif line < self.height:
+            self.listbox.delete(line)
+            if len(self.rows) - self.top < self.height and self.rows:
+                self.rows += self.fetch_after(self.rows[-1].id, self.overscan)
+            if self.top + self.height <= len(self.rows):
+                self.listbox.insert(tk.END, self.format_row(self.rows[self.top + self.height - 1]))
+        self.update_scrollbar(self.rows[self.top:self.top + self.height])
+
+    def jump_to(self, fraction):
+        '''Jump to a fractional position of the table, estimated from the id range'''
+        fraction = min(max(fraction, 0.0), 1.0)
+        if self.search_rows is not None:
+            self.top = max(0, min(int(fraction * len(self.rows)), len(self.rows) - self.height))
+            self.render()
+            return
+        anchor = self.min_id + int(fraction * (self.max_id - self.min_id + 1))
+        self.load_around(anchor)
+
+    def trim(self):
+        '''Drop buffered rows that are further than overscan from the viewport'''
+        if self.search_rows is not None:
+            return
+        start = max(0, self.top - self.overscan)
+        self.rows = self.rows[start:self.top + self.height + self.overscan]
+        self.top -= start
+
+    def render(self):
+        '''Redraw the visible rows and the scrollbar'''
+        visible = self.rows[self.top:self.top + self.height]
+        self.listbox.configure(state=tk.NORMAL)
+        self.listbox.delete(0, tk.END)
+        if visible:
+            self.listbox.insert(tk.END, *[self.format_row(row) for row in visible])
+
+        for index, row in enumerate(visible):
+            if row.id == self.selected_id:
+                self.listbox.selection_set(index)
+
+        self.update_scrollbar(visible)
+
+    def update_scrollbar(self, visible):
+        '''Position the scrollbar from the id range, which avoids counting rows'''
+        if self.search_rows is not None:
+            if len(self.rows) <= self.height:
+                self.scrollbar.set(0.0, 1.0)
+            else:
+                self.scrollbar.set(self.top / len(self.rows), (self.top + self.height) / len(self.rows))
+            return
+
+        if not visible or self.total <= self.height:
+            self.scrollbar.set(0.0, 1.0)
+            return
+
+        size = self.height / self.total
+        if visible[-1].id >= self.max_id:
+            first = 1.0 - size
+        else:
+            first = (visible[0].id - self.min_id) / (self.max_id - self.min_id + 1)
+        self.scrollbar.set(first, min(first + size, 1.0))
+
+    def on_scrollbar(self, *args):
+        '''Handle scrollbar drags, arrows and trough clicks'''
+        if args[0] == "moveto":
+            self.jump_to(float(args[1]))
+        elif args[0] == "scroll":
+            count = int(args[1])
+            if args[2] == "pages":
+                count *= self.height
+            self.scroll_by(count)
+
+    def on_mousewheel(self, event):
+        '''Scroll three rows per wheel notch'''
+        self.scroll_by(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def on_select(self, event):
+        '''Remember the selected task by id so it survives scrolling'''
+        task = self.selected_task()
+        self.selected_id = task.id if task else None
+
+    def move_selection(self, step):
+        '''Move the selection with the arrow keys, scrolling at the edges'''
+        selection = self.listbox.curselection()
+        index = selection[0] + step if selection else 0
+        visible = len(self.rows) - self.top
+
+        if index < 0:
+            self.scroll_by(-1)
+            index = 0
+        elif index >= min(self.height, visible):
+            self.scroll_by(1)
+            index = min(self.height, len(self.rows) - self.top) - 1
+
+        if index >= 0:
+            self.listbox.selection_clear(0, tk.END)
+            self.listbox.selection_set(index)
+            self.on_select(None)
+        return "break"
@@ -1,18 +1,38 @@
 import tkinter as tk
-import os
 from tkinter import ttk
 from tkinter import messagebox
+from tkinter import filedialog
+import csv
+import re
 import sqlite3
 from datetime import datetime
-
-class TaskManager:
-    def __init__(self, root):
-        self.root = root
+from .database import get_connection
+from .db_executor import QueryGroup, get_executor
+from .dispatch import get_dispatcher
+from .formatting import to_12_hour, to_24_hour
+from .screens import Screen
+from .stores import TaskStore
+from .task_io import export_tasks, import_tasks
+from .task_list_view import VirtualTaskList
+from .task_status import compute_status, wake_status_engine
+from .write_queue import get_write_queue
+
+SEARCH_DEBOUNCE_MS = 200  # Wait for a pause in typing before querying
+SEARCH_RESULT_LIMIT = 100
+
+class TaskManager(Screen):
+    background = '#ff9f2a'
+    min_size = (1280, 950)
+
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
         self.conn = None
-        self.cursor = None
-        self.root['background'] = '#ff9f2a'
-        self.root.minsize(width=1280, height=950)
-        self.task_list_tasks = []
+        self.tasks = None
+        self.search_job = None
+        self.date_vars = None  # (month, day, year) variables of the open form
+        self.writes = get_write_queue()
+        self.ui = get_dispatcher(self.root)
+        self.queries = QueryGroup(get_executor(), self.ui)
 
         self.open_db_conn()
 
@@ -20,81 +40,53 @@ class TaskManager:
         self.create_task_manager_ui()
   
     def open_db_conn(self):
-        '''Open and intitialize the database'''
+        '''Borrow the shared database connection. The schema is set up once per process'''
         if self.conn is None:
-          db_dir = os.path.join(os.getcwd(), "data")
-          self.conn = sqlite3.connect(f"{db_dir}/tasks.db")
-          self.cursor = self.conn.cursor()
-          self.setup_database()
+          self.conn = get_connection()
+          self.tasks = TaskStore(self.conn)
 
     def close_db_conn(self):
-        '''Close the connection to the SQLite database.'''
+        '''Release the shared connection. It stays open for the next screen'''
+        self.queries.cancel()
         if self.conn:
-            self.conn.close()
             self.conn = None
-            self.cursor = None
+            self.tasks = None
+
+    def on_show(self):
+        '''Reload the list only if the data changed while the screen was hidden'''
+        super().on_show()
+        if self.data_changed():
+            self.load_tasks()
+
+    def on_hide(self):
+        if self.queries.cancel():
+            self.forget_data_version()
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+
+    def destroy(self):
+        super().destroy()
+        self.close_db_conn()
 
     def return_to_home(self):
-        from main import SmartClockApp
         '''Return to the home screen'''
-        
-        self.close_db_conn()
-        SmartClockApp(self.root)
-
-    def setup_database(self):
-        '''Create the database tables if they don't exist'''
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tags (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
-
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT UNIQUE NOT NULL,
-                due_date TEXT NOT NULL,
-                due_time TEXT,
-                description TEXT,
-                tag_id INTEGER,
-                status TEXT CHECK(status IN ('completed', 'upcoming', 'overdue')) NOT NULL,
-                FOREIGN KEY (tag_id) REFERENCES tags (id)
-            )
-        ''')
-
-        # Ensure 'misc' tag exists, and only create it if it doesn't. Ignore otherwise
-        self.cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES ('misc')")
-        self.conn.commit() # Commit changes to the database
-
-    def clear_window(self):
-        '''Clear all widgets in the window'''
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        self.reset_left_frame()
+        self.app.show("home")
 
     def create_task_manager_ui(self):
         '''Create the task manager UI'''
-
-        self.clear_window()
-
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#ff9f2a')
-
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
-
-        home_button = ttk.Button(self.root, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
+        home_button = ttk.Button(self.frame, text='Home', style='Custom.TButton', command=self.return_to_home).pack(anchor=tk.NW, padx=30, pady=30)
 
         # Split UI into left and right frames
-        self.left_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.left_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.left_frame.pack(side="left", fill="y", padx=30, pady=30)
 
-        self.right_frame = ttk.Frame(self.root, style='Custom.TFrame')
+        self.right_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         self.right_frame.pack(side="right", expand=True, fill="both", padx=10, pady=10)
 
         # New task interface
-        self.new_task_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Create New Task", command=self.render_task_form)
-        self.new_task_button.pack(pady=20)
+        self.reset_left_frame()
 
         # Task list on the right
         task_frame = ttk.Frame(self.right_frame, style='Custom.TFrame')
@@ -103,15 +95,74 @@ class TaskManager:
         self.task_list_label = ttk.Label(task_frame, background='#ff9f2a', text="Tasks", font=("Arial", 16))
         self.task_list_label.pack(pady=10)
 
-        self.task_list = tk.Listbox(task_frame, height=20, width=50)
+        # Search box, queried as you type
+        search_frame = ttk.Frame(task_frame, style='Custom.TFrame')
+        search_frame.pack(pady=5)
+        ttk.Label(search_frame, background='#ff9f2a', text="Search:").pack(side="left", padx=5)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", self.on_search_changed)
+        ttk.Entry(search_frame, textvariable=self.search_var, width=40).pack(side="left", padx=5)
+
+        self.task_list = VirtualTaskList(task_frame, self.tasks, self.format_task, height=20, width=50, queries=self.queries)
         self.task_list.pack(pady=10)
 
         # Buttons for updating and deleting tasks
         self.update_button = ttk.Button(task_frame, style='Custom.TButton', text="Update Task", command=self.render_update_task_form).pack(pady=10)
         self.delete_button = ttk.Button(task_frame, style='Custom.TButton', text="Delete Task", command=self.delete_task).pack(pady=10)
 
-        # Load tasks into the list
-        self.load_tasks()
+    def reset_left_frame(self):
+        '''Close any open form and show the new task button'''
+        for widget in self.left_frame.winfo_children():
+            widget.destroy()
+
+        self.new_task_button = ttk.Button(self.left_frame, style='Custom.TButton', text="Create New Task", command=self.render_task_form)
+        self.new_task_button.pack(pady=20)
+
+        ttk.Button(self.left_frame, style='Custom.TButton', text="Import Tasks", command=self.import_task_file).pack(pady=10)
+        ttk.Button(self.left_frame, style='Custom.TButton', text="Export Tasks", command=self.export_task_file).pack(pady=10)
+
+    def import_task_file(self):
+        '''Import tasks from a CSV or JSONL file'''
+        path = filedialog.askopenfilename(title="Import Tasks", filetypes=[("Task files", "*.csv *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+
+        # The import runs on the writer thread, so the window stays responsive while it streams in
+        future = self.writes.submit(lambda conn: import_tasks(TaskStore(conn), path))
+        self.ui.when_done(future, self.on_tasks_imported)
+
+    def on_tasks_imported(self, future):
+        '''Report an import once it has been committed'''
+        try:
+            imported, skipped = future.result()
+        except (ValueError, KeyError, OSError, csv.Error, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Failed to import tasks: {e}")
+            return
+
+        wake_status_engine()
+        if self.conn is not None:
+            self.load_tasks()
+        messagebox.showinfo("Success", f"Imported {imported} tasks. Skipped {skipped} with titles that already exist.")
+
+    def export_task_file(self):
+        '''Export all tasks to a CSV or JSONL file'''
+        path = filedialog.asksaveasfilename(title="Export Tasks", defaultextension=".csv", filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl")])
+        if not path:
+            return
+
+        # The export streams on a read worker, so a large table doesn't freeze the window
+        future = self.queries.executor.submit(lambda conn: export_tasks(TaskStore(conn), path))
+        self.ui.when_done(future, self.on_tasks_exported)
+
+    def on_tasks_exported(self, future):
+        '''Report an export once the file has been written'''
+        try:
+            count = future.result()
+        except (ValueError, OSError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Failed to export tasks: {e}")
+            return
+
+        messagebox.showinfo("Success", f"Exported {count} tasks.")
 
     def render_task_form(self):
         '''Renders the task creation form'''
@@ -154,18 +205,16 @@ class TaskManager:
 
         # Task Options
         ttk.Button(button_frame, style='Custom.TButton', text="Save Task", command=lambda: self.save_task(date_vars[2], date_vars[0], date_vars[1])).pack(side=tk.LEFT, padx=20)
-        ttk.Button(button_frame, style='Custom.TButton', text="Back", command=self.create_task_manager_ui).pack(side=tk.LEFT, padx=20)
+        ttk.Button(button_frame, style='Custom.TButton', text="Back", command=self.reset_left_frame).pack(side=tk.LEFT, padx=20)
 
     def render_update_task_form(self):
       '''Renders the task update form'''
-      selected_index = self.task_list.curselection()
-      if not selected_index:
+      task = self.task_list.selected_task()  # Get task metadata
+      if task is None:
           messagebox.showerror("Error", "Please select a task to update.")
           return
-      
-      task = self.task_list_tasks[selected_index[0]]  # Get task metadata
-      self.cursor.execute("SELECT id FROM tasks WHERE title = ?", (task[0],))
-      task_id = self.cursor.fetchone()[0]
+
+      task_id = task.id
 
       # Clear left frame and create update form
       for widget in self.left_frame.winfo_children():
@@ -181,7 +230,7 @@ class TaskManager:
 
       # Populate fields with task data
       self.title_entry = self.create_form_field(update_frame, "Title:")
-      self.title_entry.insert(0, task[0])  # Pre-fill with current title
+      self.title_entry.insert(0, task.title)  # Pre-fill with current title
 
       date_vars = self.create_date_incrementer(update_frame)
       self.date_entry = f"{date_vars[0].get()}-{date_vars[1].get()}-{date_vars[2].get()}"
@@ -191,11 +240,11 @@ class TaskManager:
       self.am_pm_var = time_vars[2]
 
       self.description_entry = self.create_form_field(update_frame, "Description:", True)
-      self.description_entry.insert("1.0", task[3])  # Pre-fill with current description
+      self.description_entry.insert("1.0", task.description)  # Pre-fill with current description
 
       # Tag management
       ttk.Label(update_frame, background='#ff9f2a', text="Tag:").pack(anchor="w", pady=5)
-      self.tag_var = tk.StringVar(value=task[4])
+      self.tag_var = tk.StringVar(value=task.tag)
       self.tag_entry = ttk.Entry(update_frame, textvariable=self.tag_var)
       self.tag_entry.pack(fill="x", pady=5)
       ttk.Button(update_frame, text="Add Tag", command=self.add_new_tag).pack(pady=5)
@@ -211,7 +260,7 @@ class TaskManager:
 
       # Save updated task
       ttk.Button(button_frame, text="Save Changes", style='Custom.TButton', command=lambda: self.update_task(task_id, date_vars[2], date_vars[0], date_vars[1])).pack(side=tk.LEFT, padx=20)
-      ttk.Button(button_frame, text="Back", style='Custom.TButton', command=self.create_task_manager_ui).pack(side=tk.LEFT, padx=20)
+      ttk.Button(button_frame, text="Back", style='Custom.TButton', command=self.reset_left_frame).pack(side=tk.LEFT, padx=20)
 
     def update_task(self, task_id, year_var, month_var, day_var):
       '''Update an existing task in the database'''
@@ -230,17 +279,28 @@ class TaskManager:
       tag_name = self.tag_var.get().strip()
       if not tag_name:
           tag_name = "misc"
-      self.cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag_name,))
-      self.conn.commit()
-      self.cursor.execute("SELECT id FROM tags WHERE name = ?", (tag_name,))
-      tag_id = self.cursor.fetchone()[0]
-
-      self.cursor.execute(
-          "UPDATE tasks SET title = ?, due_date = ?, due_time = ?, description = ?, tag_id = ? WHERE id = ?",
-          (title, due_date, due_time, description, tag_id, task_id)
-      )
-      self.conn.commit()
-      self.load_tasks()
+
+      # Recompute the status for the new due date. The store leaves completed tasks alone.
+      status = compute_status(due_date, due_time)
+      future = self.writes.submit(lambda conn: TaskStore(conn).update(task_id, title, due_date, due_time, description, tag_name, status))
+      self.ui.when_done(future, lambda done: self.on_task_updated(done, task_id))
+
+    def on_task_updated(self, future, task_id):
+      '''Refresh an edited task's row once the change is committed'''
+      try:
+          future.result()
+      except sqlite3.IntegrityError:
+          messagebox.showerror("Error", "A task with this title already exists.")
+          return
+      except sqlite3.Error as e:
+          messagebox.showerror("Error", f"Failed to update task: {e}")
+          if self.conn is not None:
+              self.load_tasks()
+          return
+
+      wake_status_engine()
+      if self.conn is not None:
+          self.task_list.update_row(task_id)
 
     def create_form_field(self, frame, label_text, is_multiline=False):
         '''Create a form field with a label'''
@@ -264,20 +324,22 @@ class TaskManager:
 
         month_var = tk.StringVar(value=str(datetime.now().month))
         month_spinbox = ttk.Spinbox(date_frame, from_=1, to=12, width=3, textvariable=month_var, validate='key')
-        month_spinbox.configure(validatecommand=(self.root.register(self.validate_month), '%P'))
+        month_spinbox.configure(validatecommand=(self.register_command(self.validate_month), '%P'))
         month_spinbox.grid(row=0, column=0, padx=5)
 
         date_var = tk.StringVar(value=str(datetime.now().day))
         date_spinbox = ttk.Spinbox(date_frame, from_=1, to=31, width=3, textvariable=date_var, validate='key')
-        date_spinbox.configure(validatecommand=(self.root.register(lambda value: self.validate_day(value, year_var, month_var)), '%P'))
+        date_spinbox.configure(validatecommand=(self.register_command(self.validate_day), '%P'))
         date_spinbox.grid(row=0, column=1, padx=5)
 
         year_var = tk.StringVar(value=str(datetime.now().year))
         year_spinbox = ttk.Spinbox(date_frame, from_=2024, to=2040, width=6, textvariable=year_var, validate='key')
-        year_spinbox.configure(validatecommand=(self.root.register(self.validate_year), '%P'))
+        year_spinbox.configure(validatecommand=(self.register_command(self.validate_year), '%P'))
         year_spinbox.grid(row=0, column=2, padx=5)
 
-        return (month_var, date_var, year_var)
+        # Only one form is open at a time, so validate_day checks against this one
+        self.date_vars = (month_var, date_var, year_var)
+        return self.date_vars
 
     def create_time_selector(self, frame):
         '''Create a time selector with spinboxes for hour, minute, and AM/PM'''
@@ -291,12 +353,12 @@ class TaskManager:
 
         hour_var = tk.StringVar()
         hour_spinbox = ttk.Spinbox(time_frame, background='#ff9f2a', from_=1, to=12, width=3, textvariable=hour_var, validate='key')
-        hour_spinbox.configure(validatecommand=(self.root.register(self.validate_hour), '%P'))
+        hour_spinbox.configure(validatecommand=(self.register_command(self.validate_hour), '%P'))
         hour_spinbox.grid(row=0, column=0, padx=5)
 
         minute_var = tk.StringVar()
         minute_spinbox = ttk.Spinbox(time_frame, background='#ff9f2a', from_=0, to=59, width=3, textvariable=minute_var, format="%02.0f", validate='key')
-        minute_spinbox.configure(validatecommand=(self.root.register(self.validate_minutes), '%P'))
+        minute_spinbox.configure(validatecommand=(self.register_command(self.validate_minutes), '%P'))
         minute_spinbox.grid(row=0, column=1, padx=5)
 
         am_pm_var = tk.StringVar(value="AM")
@@ -307,17 +369,11 @@ class TaskManager:
 
     def convert_time_to_24hour(self, time_str):
         '''Converts a time string from 12-hour format to 24-hour format'''
-        try:
-            return datetime.strptime(time_str, "%I:%M %p").strftime("%H:%M")
-        except ValueError:
-            return None
+        return to_24_hour(time_str)
 
     def convert_time_to_ampm(self, time_str):
         '''Converts a time string from 24-hour format to 12-hour format'''
-        try:
-            return datetime.strptime(time_str, "%H:%M").strftime("%I:%M %p")
-        except ValueError:
-            return None
+        return to_12_hour(time_str)
         
     def validate_month(self, value):
         '''Validate the month spinbox'''
@@ -326,9 +382,10 @@ class TaskManager:
             return month >= 1 and month <= 12
         return False
     
-    def validate_day(self, value, year_var, month_var):
-        '''Validate the day spinbox'''
+    def validate_day(self, value):
+        '''Validate the day spinbox against the month and year of the date being edited'''
         if value.isdigit():
+            month_var, _, year_var = self.date_vars
             day = int(value)
             month = int(month_var.get())
             year = int(year_var.get())
@@ -362,10 +419,8 @@ class TaskManager:
         return False
 
     def load_tags(self):
-        '''Load tags from the database and populate the dropdown'''
-        self.cursor.execute("SELECT name FROM tags")
-        tags = [tag[0] for tag in self.cursor.fetchall()]
-        self.tag_dropdown["values"] = tags
+        '''Load tags from the tag cache and populate the dropdown'''
+        self.tag_dropdown["values"] = self.tasks.tag_names()
         if not self.tag_var.get():
             self.tag_var.set("misc")
 
@@ -373,31 +428,65 @@ class TaskManager:
         '''Add a new tag to the database'''
         new_tag = self.tag_var.get().strip()
         if new_tag:
-            self.cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (new_tag,))
-            self.conn.commit()
-            self.load_tags()
+            future = self.writes.submit(lambda conn: TaskStore(conn).add_tag(new_tag))
+            self.ui.when_done(future, self.on_tag_added)
         else:
             tk.messagebox.showerror("Error", "Tag name cannot be empty.")
 
+    def on_tag_added(self, future):
+        '''Show a new tag in the dropdown once it is committed'''
+        try:
+            future.result()
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to add tag: {e}")
+        if self.conn is not None and self.tag_dropdown.winfo_exists():
+            self.load_tags()
+
     def load_tasks(self):
-        '''Load tasks from the database and display them in the listbox'''
-        # Clear current list
-        self.task_list.delete(0, tk.END)
-        self.task_list_tasks = []
-
-        # Fetch and display tasks
-        self.cursor.execute('''
-            SELECT tasks.title, tasks.due_date, tasks.due_time, tasks.description, tags.name, tasks.status
-            FROM tasks
-            LEFT JOIN tags ON tasks.tag_id = tags.id
-        ''')
-        tasks = self.cursor.fetchall()
-
-        for task in tasks:
-            task_time = self.convert_time_to_ampm(task[2]) if task[2] else 'All-Day'
-            task_display = f"{task[0]} | {task[1]} | {task_time} | {task[4]} | {task[5]} | {task[3]}"
-            self.task_list.insert(tk.END, task_display)
-            self.task_list_tasks.append(task)
+        '''Load the visible window of tasks into the listbox'''
+        if self.search_var.get().strip():
+            self.run_search()
+        else:
+            self.task_list.refresh()
+
+    def on_search_changed(self, *args):
+        '''Debounce the search box so a burst of keystrokes runs one query'''
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.run_search)
+
+    def run_search(self):
+        '''Show the tasks matching the search box, best matches first'''
+        self.search_job = None
+        if not self.task_list.listbox.winfo_exists():
+            return
+
+        # Match every word as a prefix, e.g. 'gro milk' -> '"gro"* "milk"*'.
+        # Single letters match most of the table and would make ranking slow, so they are skipped.
+        words = [word for word in re.findall(r"\w+", self.search_var.get()) if len(word) > 1]
+        if not words:
+            self.queries.cancel("search")
+            self.task_list_label.config(text="Tasks")
+            self.task_list.clear_search()
+            return
+
+        # A newer search replaces one still running, so only the latest results are shown
+        self.task_list_label.config(text="Searching...")
+        self.queries.run("search", lambda conn: TaskStore(conn).search(words, SEARCH_RESULT_LIMIT), self.show_search_results, self.on_search_failed)
+
+    def on_search_failed(self, error):
+        self.task_list_label.config(text="Tasks")
+        messagebox.showerror("Error", f"Search failed: {error}")
+
+    def show_search_results(self, results):
+        '''Show the results of the latest search'''
+        self.task_list_label.config(text=f"Search Results ({len(results)})")
+        self.task_list.show_search_results(results)
+
+    def format_task(self, task):
+        '''Format a task row for display in the listbox'''
+        task_time = self.convert_time_to_ampm(task.due_time) if task.due_time else 'All-Day'
+        return f"{task.title} | {task.due_date} | {task_time} | {task.tag} | {task.status} | {task.description}"
 
     def save_task(self, year_var, month_var, day_var):
         '''Save a new task to the database'''
@@ -418,42 +507,49 @@ class TaskManager:
         tag_name = self.tag_var.get().strip()
         if not tag_name:
             tag_name = "misc"
-        self.cursor.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (tag_name,))
-        self.conn.commit()
-        self.cursor.execute("SELECT id FROM tags WHERE name = ?", (tag_name,))
-        tag_id = self.cursor.fetchone()[0]
 
         # Determine task status based on date and time
-        task_datetime_str = f"{due_date} {due_time}" if due_time else due_date
-        task_datetime = datetime.strptime(task_datetime_str, "%Y-%m-%d %H:%M") if due_time else datetime.strptime(task_datetime_str, "%Y-%m-%d")
-        current_datetime = datetime.now()
+        status = compute_status(due_date, due_time)
 
-        if task_datetime < current_datetime:
-            status = "overdue"
-        else:
-            status = "upcoming"
+        # Insert task into the database. A new tag is committed together with the task.
+        future = self.writes.submit(lambda conn: TaskStore(conn).create(title, due_date, due_time, description, tag_name, status))
+        self.ui.when_done(future, self.on_task_created)
 
-        # Insert task into the database
-        self.cursor.execute(
-            "INSERT INTO tasks (title, due_date, due_time, description, tag_id, status) VALUES (?, ?, ?, ?, ?, ?)",
-            (title, due_date, due_time, description, tag_id, status)
-        )
-        self.conn.commit()
+    def on_task_created(self, future):
+        '''Show the new row and reset the form once the task is committed'''
+        try:
+            task_id = future.result()
+        except sqlite3.IntegrityError:
+            messagebox.showerror("Error", "A task with this title already exists.")
+            return
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to create task: {e}")
+            return
 
-        # Reload task list and reset UI
-        self.create_task_manager_ui()
+        wake_status_engine()
+        if self.conn is not None:
+            self.task_list.insert_row(task_id)
+            self.reset_left_frame()
 
     def delete_task(self):
       '''Delete the selected task from the database'''
-      selected_index = self.task_list.curselection()
-      if not selected_index:
+      task = self.task_list.selected_task()
+      if task is None:
           messagebox.showerror("Error", "Please select a task to delete.")
           return
 
-      tup = self.task_list_tasks[selected_index[0]]
-      self.cursor.execute("SELECT id FROM tasks WHERE title = ?", (tup[0],))
-      task_id = self.cursor.fetchone()[0]
-      # task_id = self.task_list_tasks[selected_index[0]][0]  # Get task ID
-      self.cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-      self.conn.commit()
-      self.load_tasks()
\ No newline at end of file
+      future = self.writes.submit(lambda conn: TaskStore(conn).delete(task.id))
+      self.ui.when_done(future, lambda done: self.on_task_deleted(done, task.id))
+
+    def on_task_deleted(self, future, task_id):
+      '''Drop a deleted task's row once the delete is committed'''
+      try:
+          future.result()
+      except sqlite3.Error as e:
+          messagebox.showerror("Error", f"Failed to delete task: {e}")
+          if self.conn is not None:
+              self.load_tasks()
+          return
+
+      if self.conn is not None:
+          self.task_list.remove_row(task_id)
\ No newline at end of file
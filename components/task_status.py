@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from .database import get_pool
+from .scheduler import get_scheduler
+from .stores import TaskStore
+
+# Upper bound on the time between passes, so a changed wall clock is noticed eventually
+MAX_SLEEP_SECONDS = 3600
+
+def due_datetime(due_date, due_time):
+    '''Return the moment a task becomes overdue. All-day tasks are due at the start of their day'''
+    if due_time:
+        return datetime.strptime(f"{due_date} {due_time}", "%Y-%m-%d %H:%M")
+    return datetime.strptime(due_date, "%Y-%m-%d")
+
+def compute_status(due_date, due_time, now=None):
+    '''Return 'overdue' or 'upcoming' for a task that is not completed'''
+    now = now or datetime.now()
+    return "overdue" if due_datetime(due_date, due_time) < now else "upcoming"
+
+class TaskStatusEngine:
+    '''Keeps tasks.status in step with the clock as a job on the shared scheduler.
+
+    The engine marks overdue tasks at startup, then schedules its next pass for
+    when the next upcoming task is due. Call wake() after changing a due date so it
+    can reschedule. Each pass borrows a connection from the background pool
+    (the shared one unless another pool is given) and returns it straight away.
+    '''
+    def __init__(self, pool=None, scheduler=None):
+        self.pool = pool
+        self.scheduler = scheduler or get_scheduler()
+        self.lock = threading.Lock()
+        self.job = None
+        self.running = False
+
+    def start(self):
+        '''Schedule the first pass if the engine is not already running'''
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+        self.wake()
+
+    def stop(self):
+        '''Cancel the next pass'''
+        with self.lock:
+            self.running = False
+            if self.job is not None:
+                self.job.cancel()
+                self.job = None
+
+    def wake(self):
+        '''Recompute statuses and the next pass time now'''
+        self.reschedule(0)
+
+    def reschedule(self, delay, replacing=None):
+        '''Replace the pending pass with one delay seconds from now.
+
+        With replacing, only do so if that job is still the pending one.
+        '''
+        with self.lock:
+            if not self.running or (replacing is not None and self.job is not replacing):
+                return
+            if self.job is not None:
+                self.job.cancel()
+            self.job = self.scheduler.call_later(delay, self.run, name="task-status")
+
+    def update(self):
+        '''Mark overdue tasks and return when the next upcoming task is due, or None'''
+        with (self.pool or get_pool()).connection() as conn:
+            tasks = TaskStore(conn)
+            tasks.mark_overdue()
+            due = tasks.next_due()
+        return due_datetime(*due) if due else None
+
+    def run(self):
+        current = self.job
+        try:
+            due = self.update()
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Error updating task statuses: {e}")
+            due = None
+
+        delay = MAX_SLEEP_SECONDS
+        if due is not None:
+            # Run just after the minute the task is due in, since due times have minute resolution
+            delay = min(delay, max(0.0, (due + timedelta(seconds=1) - datetime.now()).total_seconds()))
+        # Leave alone a fresh pass that wake() queued while this one ran
+        self.reschedule(delay, replacing=current)
+
+_engine = None
+
+def start_status_engine():
+    '''Start the shared status engine once per process and return it'''
+    global _engine
+    if _engine is None:
+        _engine = TaskStatusEngine()
+    _engine.start()
+    return _engine
+
+def wake_status_engine():
+    '''Ask the shared status engine, if running, to recompute statuses'''
+    if _engine is not None:
+        _engine.wake()
+
+def stop_status_engine():
+    '''Stop the shared status engine, if running'''
+    if _engine is not None:
+        _engine.stop()
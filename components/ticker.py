@@ -0,0 +1,189 @@
+import itertools
+import math
+import sys
+import time
+
+# Fire this long after each second boundary, so a tick never lands just before the second it shows
+TICK_OFFSET_MS = 5
+
+class Ticker:
+    '''Calls subscribers once per wall-clock second on the Tk main loop.
+
+    Each tick is scheduled for just after the next second boundary, measured
+    afresh every time, so a late callback delays one tick rather than every
+    tick after it. With no subscribers, nothing is scheduled.
+    '''
+    def __init__(self, root):
+        self.root = root
+        self.subscribers = {}  # token -> callback, in subscription order
+        self.tokens = itertools.count()
+        self.tick_id = None
+
+    def subscribe(self, callback):
+        '''Call callback() every second until unsubscribed. Returns a token for unsubscribe()'''
+        token = next(self.tokens)
+        self.subscribers[token] = callback
+        if self.tick_id is None:
+            self.schedule()
+        return token
+
+    def unsubscribe(self, token):
+        self.subscribers.pop(token, None)
+        if not self.subscribers and self.tick_id is not None:
+            self.root.after_cancel(self.tick_id)
+            self.tick_id = None
+
+    def schedule(self):
+        delay = 1000 - int(time.time() * 1000) % 1000 + TICK_OFFSET_MS
+        self.tick_id = self.root.after(delay, self.tick)
+
+    def tick(self):
+        self.tick_id = None
+        for token, callback in list(self.subscribers.items()):
+            if token not in self.subscribers:
+                continue  # Unsubscribed by an earlier callback this tick
+            try:
+                callback()
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+        if self.subscribers and self.tick_id is None:
+            self.schedule()
+
+class Countdown:
+    '''Time left until a deadline on the monotonic clock, which wall-clock changes and late callbacks don't affect'''
+    def __init__(self, seconds, clock=time.monotonic, start=None):
+        '''Count down seconds from start (default: now) on clock'''
+        self.clock = clock
+        self.deadline = (clock() if start is None else start) + seconds
+        self.paused_remaining = None
+
+    @property
+    def paused(self):
+        return self.paused_remaining is not None
+
+    def remaining(self):
+        '''Seconds left, never negative'''
+        if self.paused:
+            return self.paused_remaining
+        return max(0.0, self.deadline - self.clock())
+
+    def seconds_left(self):
+        '''Whole seconds left for display, rounded up so zero only shows once time is up'''
+        return math.ceil(self.remaining())
+
+    def finished(self):
+        return self.remaining() <= 0
+
+    def pause(self):
+        if not self.paused:
+            self.paused_remaining = self.remaining()
+
+    def resume(self):
+        if self.paused:
+            self.deadline = self.clock() + self.paused_remaining
+            self.paused_remaining = None
+
+class CountdownTimer:
+    '''Runs a Countdown for a screen on the Tk main loop.
+
+    While the screen is shown, on_tick(seconds_left) runs on the shared
+    ticker. on_done() runs once time is up, from a single after() at the
+    deadline, so a running timer on a hidden screen costs no callbacks.
+    '''
+    def __init__(self, root, on_tick, on_done):
+        self.root = root
+        self.ticker = get_ticker(root)
+        self.on_tick = on_tick
+        self.on_done = on_done
+        self.countdown = None
+        self.shown = False
+        self.tick_token = None
+        self.alarm_id = None
+
+    @property
+    def running(self):
+        return self.countdown is not None and not self.countdown.paused
+
+    @property
+    def paused(self):
+        return self.countdown is not None and self.countdown.paused
+
+    def seconds_left(self):
+        return self.countdown.seconds_left() if self.countdown is not None else 0
+
+    def start(self, seconds):
+        '''Start counting down from seconds, replacing any current countdown'''
+        self.stop()
+        self.countdown = Countdown(seconds)
+        self.follow()
+
+    def pause(self):
+        if self.running:
+            self.countdown.pause()
+            self.unfollow()
+
+    def resume(self):
+        if self.paused:
+            self.countdown.resume()
+            self.follow()
+
+    def stop(self):
+        '''Drop the countdown without calling on_done'''
+        self.unfollow()
+        self.countdown = None
+
+    def show(self):
+        '''Start ticking the display. Call when the screen is shown'''
+        self.shown = True
+        if self.running:
+            self.follow()
+
+    def hide(self):
+        '''Stop ticking the display; on_done still runs on time. Call when the screen is hidden'''
+        self.shown = False
+        if self.tick_token is not None:
+            self.ticker.unsubscribe(self.tick_token)
+            self.tick_token = None
+
+    def follow(self):
+        if self.alarm_id is None:
+            self.set_alarm()
+        if self.shown and self.tick_token is None:
+            self.tick_token = self.ticker.subscribe(self.tick)
+        self.tick()
+
+    def unfollow(self):
+        if self.alarm_id is not None:
+            self.root.after_cancel(self.alarm_id)
+            self.alarm_id = None
+        if self.tick_token is not None:
+            self.ticker.unsubscribe(self.tick_token)
+            self.tick_token = None
+
+    def set_alarm(self):
+        self.alarm_id = self.root.after(math.ceil(self.countdown.remaining() * 1000), self.alarm)
+
+    def tick(self):
+        if self.shown and self.countdown is not None:
+            self.on_tick(self.countdown.seconds_left())
+
+    def alarm(self):
+        self.alarm_id = None
+        if not self.running:
+            return
+        if not self.countdown.finished():
+            self.set_alarm()  # Tk's timer ran slightly ahead of the monotonic clock
+            return
+        self.tick()
+        self.stop()
+        self.on_done()
+
+_ticker = None
+
+def get_ticker(root):
+    '''Return the ticker for the application window'''
+    global _ticker
+    if _ticker is None or _ticker.root is not root:
+        _ticker = Ticker(root)
+    return _ticker
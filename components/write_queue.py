@@ -0,0 +1,158 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from .database import connect
+from .name_cache import category_cache, tag_cache
+
+# Durability levels: (longest a queued write may wait before it is committed, synchronous mode).
+# A crash of the app loses at most the writes queued in the last max_delay seconds.
+# In WAL mode synchronous=NORMAL skips the fsync per commit, so a power cut can also
+# roll back the commits made since the last checkpoint, but never corrupts the database.
+# Set CLOCK_DURABILITY to full, normal or fast to choose the level; the default is normal.
+DURABILITY = {
+    "full": (0.0, "FULL"),
+    "normal": (0.05, "NORMAL"),
+    "fast": (0.5, "NORMAL"),
+}
+DEFAULT_DURABILITY = (os.environ.get("CLOCK_DURABILITY") or "normal").strip().lower()
+if DEFAULT_DURABILITY not in DURABILITY:
+    raise ValueError(f"CLOCK_DURABILITY must be one of {', '.join(DURABILITY)}, not '{DEFAULT_DURABILITY}'")
+MAX_BATCH = 500
+
+class WriteQueue:
+    '''Applies database writes on one background thread, grouped into short transactions.
+
+    submit() takes a function of a connection, e.g.
+    lambda conn: TaskStore(conn).delete(task_id), and returns a Future that
+    completes once the write is committed. Each write runs in its own savepoint,
+    so a failing write is rolled back without affecting the others in its group.
+    '''
+    def __init__(self, path=None, durability=DEFAULT_DURABILITY):
+        self.path = path
+        self.max_delay, self.synchronous = DURABILITY[durability]
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.RLock()
+
+    def start(self):
+        '''Start the writer thread if it is not already running'''
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="db-writer", daemon=True)
+                self.thread.start()
+
+    def submit(self, job):
+        '''Queue job(conn) and return a Future for its result'''
+        future = Future()
+        # Queued under the lock, so a writer that failed to start can't miss the job
+        with self.lock:
+            self.start()
+            self.jobs.put((future, job))
+        return future
+
+    def close(self, timeout=None):
+        '''Commit everything queued so far and stop the writer thread'''
+        if self.thread is not None and self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join(timeout)
+
+    def run(self):
+        try:
+            conn = connect(self.path)
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error opening the database for writes: {e}")
+            self.fail_queued(e)
+            return
+
+        try:
+            stopping = False
+            while not stopping:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                batch = [job]
+
+                # Keep collecting writes until the delay runs out, the batch is full or we're told to stop
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < MAX_BATCH:
+                    try:
+                        job = self.jobs.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stopping = True
+                        break
+                    batch.append(job)
+
+                self.commit(conn, batch)
+        finally:
+            conn.close()
+
+    def fail_queued(self, error):
+        '''Fail every queued write and let the next submit() start a fresh writer'''
+        with self.lock:
+            self.thread = None
+            while True:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    continue
+                future, _ = job
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+
+    def commit(self, conn, batch):
+        '''Apply a batch of writes in one transaction, then complete their futures'''
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, job in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    outcomes.append((future, job(conn), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    # Names inserted by the rolled back write are gone from the tables too
+                    tag_cache.invalidate()
+                    category_cache.invalidate()
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE write_job")
+            conn.commit()
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            tag_cache.invalidate()
+            category_cache.invalidate()
+            for future, job in batch:
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        # Only report success once the data is committed and visible to other connections
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+_write_queue = None
+
+def get_write_queue():
+    '''Return the shared write queue'''
+    global _write_queue
+    if _write_queue is None:
+        _write_queue = WriteQueue()
+    return _write_queue
+
+def close_write_queue():
+    '''Flush and stop the shared write queue, if it was used'''
+    if _write_queue is not None:
+        _write_queue.close()
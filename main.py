@@ -1,175 +1,265 @@
 import tkinter as tk
 from tkinter import ttk
+from tkinter import filedialog, messagebox
 from time import strftime
-from components import TaskManager
-from components import PomodoroTimer
-from components import SimpleTimers
-from components import SleepLogger
-from components import HabitTracker
-from components import GoogleCalendarIntegration
-import threading
-import time
-from plyer import notification
+from components.backup import create_snapshot, get_backup_dir, in_background, restore_snapshot
+from components.database import close_connections, get_pool
+from components.dispatch import get_dispatcher
+from components.lifecycle import Services
+from components.notifications import notify, stop_notifications
+from components.profiling import span, write_trace
+from components.scheduler import get_scheduler
+from components.ticker import get_ticker
+from components.screens import Screen, ScreenManager
+from components.db_executor import shutdown_executor
+from components.write_queue import close_write_queue
+from components.stores import SleepStore
+from components.task_status import start_status_engine, stop_status_engine
 import sqlite3
-import os
 import webbrowser
 
+PREWARM_SCREENS = ["pomodoro", "timers", "sleep", "tasks", "habits"]
 
-class SmartClockApp:
-    def __init__(self, root):
-        self.root = root
-        self.root.title("Productivity & Wellness Clock")
-        self.root.geometry("1280x720")
-        self.root['background'] = '#5cffa5'
-        self.setup_background_tasks()
+# Reminder intervals, in seconds
+WATER_REMINDER_INTERVAL = 3600
+STRETCH_REMINDER_INTERVAL = 1800
+SLEEP_CHECK_INTERVAL = 86400
 
-        self.root.minsize(width=1280, height=550)
-        self.show_home()
+# Spread each reminder by up to this many seconds, so they don't all fire together
+REMINDER_JITTER = 60
 
-    def clear_window(self):
-        '''Clear all widgets in the window'''
-        for widget in self.root.winfo_children():
-            widget.destroy()
+class HomeScreen(Screen):
+    background = '#5cffa5'
+    min_size = (1280, 550)
 
-    def show_home(self):
-        '''Show the home screen'''
-        self.clear_window()
-        ttk.Label(self.root, text="Select what you would like to do", background='#5cffa5', font=("Arial", 24)).pack(pady=20)
+    def __init__(self, frame, app):
+        super().__init__(frame, app)
+        self.clock_token = None
+        self.create_home_ui()
 
-        bg_style = ttk.Style()
-        bg_style.configure('Custom.TFrame', background='#5cffa5')
+    def on_show(self):
+        super().on_show()
+        self.update_clock()
+        if self.clock_token is None:
+            self.clock_token = get_ticker(self.root).subscribe(self.update_clock)
 
-        main_frame = ttk.Frame(self.root, style='Custom.TFrame')
+    def on_hide(self):
+        # The clock is only visible here, so don't tick while hidden
+        if self.clock_token is not None:
+            get_ticker(self.root).unsubscribe(self.clock_token)
+            self.clock_token = None
+
+    def create_home_ui(self):
+        '''Build the home screen'''
+        ttk.Label(self.frame, text="Select what you would like to do", background='#5cffa5', font=("Arial", 24)).pack(pady=20)
+
+        main_frame = ttk.Frame(self.frame, style='Custom.TFrame')
         # When window is expanded, expand the frame to fill the window on both sides, and center the frame
         main_frame.pack(anchor=tk.CENTER, expand=True, fill='both')
 
-        clock_label = ttk.Label(main_frame, background='#5cffa5', font=("Arial", 48))
-        clock_label.pack(pady=20)
-        self.update_clock(clock_label)
+        self.clock_label = ttk.Label(main_frame, background='#5cffa5', font=("Arial", 48))
+        self.clock_label.pack(pady=20)
 
         # Set up the button_frame using grid layout instead of pack
         button_frame = ttk.Frame(main_frame, style='Custom.TFrame')
         button_frame.pack(pady=100, anchor=tk.CENTER, expand=True)
 
-        btn_style = ttk.Style()
-        btn_style.configure('Custom.TButton', background='#ffef0a', relief='solid', font=('Arial', 18), width=15)
-
         # Add buttons to the grid layout
-        ttk.Button(button_frame, text="Pomodoro Timer", style='Custom.TButton', command=self.show_pomodoro).grid(row=0, column=0, padx=20, pady=10)
-        ttk.Button(button_frame, text="Simple Timers", style='Custom.TButton', command=self.show_timer).grid(row=0, column=1, padx=20, pady=10)
-        ttk.Button(button_frame, text="Sleep Logger", style='Custom.TButton', command=self.show_sleep_logger).grid(row=0, column=2, padx=20, pady=10)
-        ttk.Button(button_frame, text="Tasks", style='Custom.TButton', command=self.show_task_addition).grid(row=1, column=0, padx=20, pady=10)
-        ttk.Button(button_frame, text="Google Calendar", style='Custom.TButton', command=self.show_google_calendar).grid(row=1, column=1, padx=20, pady=10)
-        ttk.Button(button_frame, text="Habit Tracker", style='Custom.TButton', command=self.show_habit_tracker).grid(row=1, column=2, padx=20, pady=10, columnspan=3)
-
-        survey = ttk.Button(self.root, text="Survey", style='Custom.TButton', command=self.open_survey)
+        ttk.Button(button_frame, text="Pomodoro Timer", style='Custom.TButton', command=self.app.show_pomodoro).grid(row=0, column=0, padx=20, pady=10)
+        ttk.Button(button_frame, text="Simple Timers", style='Custom.TButton', command=self.app.show_timer).grid(row=0, column=1, padx=20, pady=10)
+        ttk.Button(button_frame, text="Sleep Logger", style='Custom.TButton', command=self.app.show_sleep_logger).grid(row=0, column=2, padx=20, pady=10)
+        ttk.Button(button_frame, text="Tasks", style='Custom.TButton', command=self.app.show_task_addition).grid(row=1, column=0, padx=20, pady=10)
+        ttk.Button(button_frame, text="Google Calendar", style='Custom.TButton', command=self.app.show_google_calendar).grid(row=1, column=1, padx=20, pady=10)
+        ttk.Button(button_frame, text="Habit Tracker", style='Custom.TButton', command=self.app.show_habit_tracker).grid(row=1, column=2, padx=20, pady=10, columnspan=3)
+        ttk.Button(button_frame, text="Back Up Data", style='Custom.TButton', command=self.back_up_data).grid(row=2, column=0, padx=20, pady=10)
+        ttk.Button(button_frame, text="Restore Backup", style='Custom.TButton', command=self.restore_backup).grid(row=2, column=1, padx=20, pady=10)
+
+        survey = ttk.Button(self.frame, text="Survey", style='Custom.TButton', command=self.open_survey)
         survey.place(relx=0, rely=1, anchor='sw')
 
         # Create and place the second button in the lower-right corner
-        bugs = ttk.Button(self.root, text="Report Issues", style='Custom.TButton', command=self.open_bugs)
+        bugs = ttk.Button(self.frame, text="Report Issues", style='Custom.TButton', command=self.open_bugs)
         bugs.place(relx=1, rely=1, anchor='se')
 
         # Center the main_frame widget by aligning it to 50% of the width and height.
         main_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
+    def back_up_data(self):
+        '''Snapshot the database in the background'''
+        get_dispatcher(self.root).when_done(in_background(create_snapshot), self.on_backup_done)
+
+    def on_backup_done(self, future):
+        try:
+            path = future.result()
+        except (OSError, RuntimeError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Backup failed: {e}")
+            return
+        messagebox.showinfo("Success", f"Saved a backup to {path}")
+
+    def restore_backup(self):
+        '''Replace all data with a chosen snapshot'''
+        path = filedialog.askopenfilename(title="Restore Backup", initialdir=get_backup_dir(), filetypes=[("Backups", "*.db")])
+        if not path:
+            return
+        if not messagebox.askyesno("Restore Backup", "This replaces all tasks, habits and sleep logs with the backup. Continue?"):
+            return
+        get_dispatcher(self.root).when_done(in_background(restore_snapshot, path), self.on_restore_done)
+
+    def on_restore_done(self, future):
+        try:
+            future.result()
+        except (OSError, RuntimeError, sqlite3.Error) as e:
+            messagebox.showerror("Error", f"Restore failed: {e}")
+            return
+        messagebox.showinfo("Success", "Backup restored.")
+
     def open_survey(self):
         webbrowser.open("https://forms.gle/GKMX5ZhE7xJ8c1y99")
 
     def open_bugs(self):
         webbrowser.open("https://github.com/ciyer17/CS122-Project/issues")
         
-    def update_clock(self, clock_label):
-        '''Update the clock every second'''
+    def update_clock(self):
+        '''Show the current time. Runs on each tick of the shared ticker'''
+        current_time = strftime("%I:%M:%S %p") # 12-hour format
+        self.clock_label.config(text=current_time)
+
+class SmartClockApp:
+    '''Owns the window, the background services and navigation between screens.
 
-        if clock_label.winfo_exists():
-            current_time = strftime("%I:%M:%S %p") # 12-hour format
-            clock_label.config(text=current_time)
-            self.root.after(1000, lambda: self.update_clock(clock_label))
+    There is one instance for the life of the process. Screens navigate
+    through show() rather than building a new app, so services are started
+    exactly once and stopped when the window closes.
+    '''
+    def __init__(self, root):
+        with span("SmartClockApp.__init__", "startup"):
+            self.root = root
+            self.root.title("Productivity & Wellness Clock")
+            self.root.geometry("1280x720")
+            self.root.protocol("WM_DELETE_WINDOW", self.quit)
+            self.reminders = []
+            self.services = Services()
+            with span("start services", "startup"):
+                self.start_services()
+
+            # Screens are built on first use and then kept, hidden, between visits
+            self.screens = ScreenManager(root, self)
+            self.screens.register("home", HomeScreen, pinned=True)
+            self.screens.register("pomodoro", "components.pomodoro:PomodoroTimer")
+            self.screens.register("timers", "components.simple_timers:SimpleTimers")
+            self.screens.register("sleep", "components.sleep_logger:SleepLogger")
+            self.screens.register("tasks", "components.task_manager:TaskManager")
+            self.screens.register("calendar", "components.google_calendar:GoogleCalendarIntegration")
+            self.screens.register("habits", "components.habit_tracker:HabitTracker")
+            self.show_home()
+
+        # Load the common screens' modules once the home screen is drawn and idle.
+        # The calendar is left out: its Google client libraries are slow to import and rarely needed.
+        self.root.after_idle(lambda: self.screens.prewarm(PREWARM_SCREENS))
+
+    def show(self, name):
+        '''Switch to the named screen'''
+        self.screens.show(name)
+
+    def show_home(self):
+        '''Show the home screen'''
+        self.show("home")
 
     def show_pomodoro(self):
         '''Show the pomodoro screen'''
-
-        self.clear_window()
-        PomodoroTimer(self.root)
+        self.show("pomodoro")
 
     def show_timer(self):
         '''Show the simple timers screen'''
-
-        self.clear_window()
-        SimpleTimers(self.root)
+        self.show("timers")
 
     def show_sleep_logger(self):
         '''Show the sleep logger screen'''
-
-        self.clear_window()
-        SleepLogger(self.root)
+        self.show("sleep")
 
     def show_task_addition(self):
         '''Show the task management screen'''
-
-        self.clear_window()
-        TaskManager(self.root)
+        self.show("tasks")
 
     def show_google_calendar(self):
-         '''Show the Google Calendar screen'''
-
-         self.clear_window()
-         GoogleCalendarIntegration(self.root)
+        '''Show the Google Calendar screen'''
+        self.show("calendar")
 
     def show_habit_tracker(self):
         '''Show the habit tracker screen'''
-        self.clear_window()
-        HabitTracker(self.root)
-
-    def setup_background_tasks(self):
-        '''Set up background tasks for notifications'''
-        threading.Thread(target=self.water_reminder, daemon=True).start()
-        threading.Thread(target=self.stretch_reminder, daemon=True).start()
-        threading.Thread(target=self.sleep_checker, daemon=True).start()
+        self.show("habits")
+
+    def start_services(self):
+        '''Start the background services. Each starts once, however often this is called'''
+        # The database, write queue and read pool start on first use; only their shutdown is registered.
+        # Services stop in reverse order, so these close last, after everything that uses them.
+        self.services.start("profiling", None, write_trace)  # Stopped last, once everything else has shut down
+        self.services.start("database", None, close_connections)
+        self.services.start("writes", None, close_write_queue)  # Commits any writes still queued
+        self.services.start("reads", None, shutdown_executor)
+        self.services.start("notifications", None, stop_notifications)
+        self.services.start("scheduler", get_scheduler().start, lambda: get_scheduler().stop(timeout=5))
+        self.services.start("task status", start_status_engine, stop_status_engine)
+        self.services.start("reminders", self.schedule_reminders, self.cancel_reminders)
+
+    def stop_services(self):
+        '''Stop the background services. Safe to call more than once'''
+        self.services.stop()
+
+    def quit(self):
+        '''Close the screens, stop the background services and close the window'''
+        self.screens.close()
+        self.stop_services()
+        self.root.destroy()
+
+    def schedule_reminders(self):
+        '''Schedule the reminders. They all share the scheduler's one worker thread'''
+        scheduler = get_scheduler()
+        self.reminders = [
+            scheduler.call_every(WATER_REMINDER_INTERVAL, self.water_reminder, jitter=REMINDER_JITTER),
+            scheduler.call_every(STRETCH_REMINDER_INTERVAL, self.stretch_reminder, jitter=REMINDER_JITTER),
+            scheduler.call_every(SLEEP_CHECK_INTERVAL, self.sleep_checker, jitter=REMINDER_JITTER),
+        ]
+
+    def cancel_reminders(self):
+        for job in self.reminders:
+            job.cancel()
+        self.reminders = []
 
     def water_reminder(self):
-        '''Notify the user every hour to drink water'''
-        while True:
-            time.sleep(3600)  # Wait for 1 hour
-            notification.notify(
-                title="Hydration Reminder",
-                message="Time to drink some water!",
-                timeout=10
-            )
+        '''Remind the user to drink water'''
+        notify(
+            title="Hydration Reminder",
+            message="Time to drink some water!",
+            timeout=10
+        )
 
     def stretch_reminder(self):
-        '''Notify the user every 30 minutes to stretch'''
-        while True:
-            time.sleep(1800)  # Wait for 30 minutes
-            notification.notify(
-                title="Stretch Reminder",
-                message="Time to stretch!",
-                timeout=10
-            )
+        '''Remind the user to stretch'''
+        notify(
+            title="Stretch Reminder",
+            message="Time to stretch!",
+            timeout=10
+        )
 
     def sleep_checker(self):
         '''Check the latest sleep log and notify if less than 8 hours'''
-        db_path = "data/sleep_logger.db"
-        while True:
-            time.sleep(86400)  # Check once a day
-            try:
-                db_dir = os.path.join(os.getcwd(), "data")
-                conn = sqlite3.connect(f"{db_dir}/tasks.db")
-                cursor = conn.cursor()
-                cursor.execute("SELECT hours_slept FROM sleep_logs ORDER BY date DESC LIMIT 1")
-                result = cursor.fetchone()
-                conn.close()
-                if result and result[0] < 8:
-                    notification.notify(
-                        title="Sleep Reminder",
-                        message="You slept less than 8 hours last night. Aim for at least 8 hours of sleep!",
-                        timeout=10
-                    )
-            except Exception as e:
-                print(f"Error checking sleep data: {e}")
-                return
+        try:
+            with get_pool().connection() as conn:
+                hours_slept = SleepStore(conn).latest_hours()
+        except sqlite3.Error as e:
+            # Try again at the next check rather than giving up
+            print(f"Error checking sleep data: {e}")
+            return
+        if hours_slept is not None and hours_slept < 8:
+            notify(
+                title="Sleep Reminder",
+                message="You slept less than 8 hours last night. Aim for at least 8 hours of sleep!",
+                timeout=10
+            )
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = SmartClockApp(root)
     root.mainloop()
+    app.stop_services()  # In case the loop ended without the window being closed